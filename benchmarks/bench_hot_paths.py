@@ -0,0 +1,307 @@
+"""
+DatabaseManager와 cog 핫패스 벤치마크.
+
+    python -m benchmarks.bench_hot_paths [--iterations 200] [--output results.json] [--compare old.json]
+
+합성 데이터(멤버 1만 명, 일정 1천 개, 일정 투표 10만 표)로 임시 SQLite 파일을 만들고,
+Discord 없이 대역 객체로 실제 핸들러를 호출해서 시나리오별 처리량과 p50/p99 지연 시간을 측정합니다.
+시나리오마다 같은 시드 파일의 복사본에서 시작하므로 서로 영향을 주지 않습니다.
+결과는 JSON으로 저장하고, --compare로 이전 커밋의 결과와 비교할 수 있습니다.
+
+Discord HTTP 요청은 하지 않으므로 측정값은 봇 내부(DB, 캐시, 렌더링) 비용입니다.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+import discord
+
+from benchmarks.bench_team_balance import percentile
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeInteraction, FakeUser
+from benchmarks.seed import GUILD_ID, member_id, member_name, seed_database
+from cogs.mvpmanagement import MVPVoteButton
+from cogs.participants import ParticipantManagement
+from cogs.schedulevoting import ScheduleVoteButton, ScheduleVoting
+from database import DatabaseManager
+from database.migrate import verify_query_plans
+from utils import metrics
+
+SCENARIOS = {}
+
+
+def scenario(name: str, max_iterations: int = None):
+    """
+    시나리오 등록. 시나리오는 (env, iterations)를 받아서 반복마다 걸린 시간(초) 목록을 반환합니다.
+
+    :param max_iterations: An upper bound for slow scenarios, regardless of --iterations.
+    """
+    def decorator(func):
+        SCENARIOS[name] = (func, max_iterations)
+        return func
+    return decorator
+
+
+class Environment:
+    def __init__(self, database: DatabaseManager, members: int, rng_seed: int) -> None:
+        self.database = database
+        self.bot = FakeBot(database)
+        self.rng = random.Random(rng_seed)
+        self.members = members
+        self.guild = FakeGuild(GUILD_ID)
+
+    def user(self, index: int = None) -> FakeUser:
+        index = self.rng.randrange(self.members) if index is None else index
+        return FakeUser(int(member_id(index)), member_name(index))
+
+    async def new_confirmed_schedule(self, players: int = 0, date: str = "2099-01-01"):
+        """ 확정 일정을 만들고 players명을 참가 신청 및 팀 배정 (측정 대상 아님) """
+        schedule_id = await self.database.insert_schedule(self.guild.id, date, status="confirmed")
+        users = [self.user(index) for index in self.rng.sample(range(self.members), players)]
+        for user in users:
+            await self.database.register_participant(schedule_id, str(user.id), user.display_name)
+        if users:
+            team_a = [(str(user.id),) for user in users[: players // 2]]
+            team_b = [(str(user.id),) for user in users[players // 2:]]
+            await self.database.assign_teams(schedule_id, team_a, team_b)
+        return schedule_id
+
+
+async def measure(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return time.perf_counter() - started
+
+
+@scenario("vote_toggle")
+async def bench_vote_toggle(env: Environment, iterations: int) -> list:
+    voting = await env.database.get_voting_schedules(env.guild.id)
+    buttons = [ScheduleVoteButton(date) for _, date, _ in voting]
+    samples = []
+    for _ in range(iterations):
+        interaction = FakeInteraction(env.bot, env.user(), env.guild)
+        samples.append(await measure(env.rng.choice(buttons).callback(interaction)))
+    await env.database.vote_tally.flush()
+    return samples
+
+
+@scenario("register")
+async def bench_register(env: Environment, iterations: int) -> list:
+    cog = ParticipantManagement(env.bot)
+    samples = []
+    for i in range(iterations):
+        # 10명마다 새 확정 일정 (정원이 찬 뒤의 거절 경로만 재지 않도록)
+        if i % cog.max_participants == 0:
+            await env.new_confirmed_schedule()
+        ctx = FakeContext(env.bot, env.user(), env.guild)
+        samples.append(await measure(cog.register_participant.callback(cog, ctx)))
+    return samples
+
+
+async def _vote_status(env: Environment, iterations: int, change_votes: bool) -> list:
+    cog = ScheduleVoting(env.bot)
+    voting = await env.database.get_voting_schedules(env.guild.id)
+    try:
+        # 차트 렌더링 프로세스 기동은 측정에서 제외
+        await cog.show_vote_status.callback(cog, FakeContext(env.bot, env.user(), env.guild))
+        samples = []
+        for _ in range(iterations):
+            if change_votes:
+                user = env.user()
+                _, date, _ = env.rng.choice(voting)
+                await env.database.vote_tally.toggle(env.guild.id, date, str(user.id), user.display_name)
+            ctx = FakeContext(env.bot, env.user(), env.guild)
+            samples.append(await measure(cog.show_vote_status.callback(cog, ctx)))
+        return samples
+    finally:
+        cog.chart_renderer.shutdown()
+
+
+@scenario("vote_status_cached")
+async def bench_vote_status_cached(env: Environment, iterations: int) -> list:
+    """ 집계가 그대로라 차트 캐시를 재사용하는 경우 """
+    return await _vote_status(env, iterations, change_votes=False)
+
+
+@scenario("vote_status_changed", max_iterations=50)
+async def bench_vote_status_changed(env: Environment, iterations: int) -> list:
+    """ 매번 표가 바뀌어 차트를 다시 렌더링하는 경우 """
+    return await _vote_status(env, iterations, change_votes=True)
+
+
+@scenario("match_result")
+async def bench_match_result(env: Environment, iterations: int) -> list:
+    cog = ParticipantManagement(env.bot)
+    samples = []
+    for _ in range(iterations):
+        await env.new_confirmed_schedule(players=10)
+        ctx = FakeContext(env.bot, env.user(), env.guild)
+        samples.append(await measure(cog.record_match_result.callback(cog, ctx, env.rng.choice(("1", "2")))))
+    return samples
+
+
+@scenario("mvp_vote")
+async def bench_mvp_vote(env: Environment, iterations: int) -> list:
+    # 완료된 경기에 MVP 투표를 열고, 참가자마다 투표권을 모두 쓰는 순서로 클릭 (측정 대상 아님)
+    clicks = []
+    async with env.database.connection.execute(
+        "SELECT schedule_id, winning_team FROM match_results ORDER BY id DESC"
+    ) as cursor:
+        matches = await cursor.fetchall()
+    for schedule_id, winning_team in matches:
+        if len(clicks) >= iterations:
+            break
+        await env.database.create_mvp_vote(schedule_id, 3, 1, True)
+        participants = await env.database.get_participants(schedule_id)
+        for voter_id, _, team in participants:
+            for _ in range(3 if team == winning_team else 1):
+                voted_for_id, label, _ = env.rng.choice([p for p in participants if p[0] != voter_id])
+                clicks.append((schedule_id, voter_id, voted_for_id, label))
+
+    samples = []
+    for schedule_id, voter_id, voted_for_id, label in clicks[:iterations]:
+        button = MVPVoteButton(schedule_id, voted_for_id, label, discord.ButtonStyle.green)
+        interaction = FakeInteraction(env.bot, FakeUser(int(voter_id), str(voter_id)))
+        samples.append(await measure(button.callback(interaction)))
+    return samples
+
+
+@scenario("member_sync_unchanged")
+async def bench_member_sync_unchanged(env: Environment, iterations: int) -> list:
+    """ 재접속 시 멤버 구성이 그대로인 경우 (워터마크 비교만) """
+    members = {member_id(i): member_name(i) for i in range(env.members)}
+    sync_key = f"member_sync:{env.guild.id}"
+    await env.database.sync_members(env.guild.id, members, sync_key)
+    return [await measure(env.database.sync_members(env.guild.id, members, sync_key)) for _ in range(iterations)]
+
+
+@scenario("member_sync_changed", max_iterations=100)
+async def bench_member_sync_changed(env: Environment, iterations: int) -> list:
+    """ 매번 멤버의 1%가 닉네임을 바꾼 경우 """
+    members = {member_id(i): member_name(i) for i in range(env.members)}
+    sync_key = f"member_sync:{env.guild.id}"
+    await env.database.sync_members(env.guild.id, members, sync_key)
+    samples = []
+    for iteration in range(iterations):
+        for index in env.rng.sample(range(env.members), max(1, env.members // 100)):
+            members[member_id(index)] = f"{member_name(index)}-{iteration}"
+        samples.append(await measure(env.database.sync_members(env.guild.id, members, sync_key)))
+    return samples
+
+
+def summarize(samples: list) -> dict:
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "throughput_per_s": len(samples) / total if total else 0.0,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    print(f"\nvs {baseline_path} (commit {baseline['meta'].get('commit')})")
+    print(f"{'scenario':<24} {'p50':>10} {'p99':>10} {'throughput':>12}")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = lambda key: (result[key] / old[key] - 1) * 100 if old[key] else math.nan
+        print(f"{name:<24} {change('p50_ms'):>+9.1f}% {change('p99_ms'):>+9.1f}% {change('throughput_per_s'):>+11.1f}%")
+
+
+async def run(args) -> dict:
+    # 느린 작업 경고 로그는 측정 결과와 섞이지 않도록 끔
+    metrics.registry.slow_threshold = math.inf
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = Path(directory) / "seed.db"
+        started = time.perf_counter()
+        sizes = await seed_database(
+            template, members=args.members, schedules=args.schedules, votes=args.votes, rng_seed=args.seed
+        )
+        print(f"Seeded {sizes} in {time.perf_counter() - started:.1f}s")
+
+        # 봇은 경고만 남기므로 쿼리 계획 회귀는 여기서 실패로 처리
+        async with aiosqlite.connect(template) as connection:
+            problems = await verify_query_plans(connection)
+        if problems:
+            raise RuntimeError("Hot-path query plans regressed:\n" + "\n".join(problems))
+
+        results = {}
+        print(f"{'scenario':<24} {'n':>6} {'ops/s':>10} {'p50':>10} {'p99':>10} {'max':>10}")
+        for name in names:
+            func, max_iterations = SCENARIOS[name]
+            path = Path(directory) / f"{name}.db"
+            shutil.copyfile(template, path)
+            database = await DatabaseManager.open(path, group_commit=args.group_commit)
+            try:
+                samples = await func(Environment(database, args.members, args.seed), min(args.iterations, max_iterations or args.iterations))
+            finally:
+                await database.close()
+            results[name] = summarize(samples)
+            result = results[name]
+            print(
+                f"{name:<24} {result['iterations']:>6} {result['throughput_per_s']:>10.1f} "
+                f"{result['p50_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms {result['max_ms']:>8.2f}ms"
+            )
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "group_commit": args.group_commit,
+            "seed": args.seed,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--members", type=int, default=10_000)
+    parser.add_argument("--schedules", type=int, default=1_000)
+    parser.add_argument("--votes", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--group-commit", action="store_true")
+    parser.add_argument("--only", help=f"Comma-separated scenarios out of {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", type=Path, default=Path("bench_hot_paths.json"))
+    parser.add_argument("--compare", type=Path, help="A previous --output file to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(report["results"], args.compare)
@@ -0,0 +1,50 @@
+"""
+팀 밸런싱 엔진 벤치마크.
+
+    python -m benchmarks.bench_team_balance [--repeat 200]
+
+인원 수별로 분할 행렬을 처음 만드는 비용(cold)과, 캐시된 뒤 한 번 배정하는 비용(warm)의
+p50/p99를 출력합니다. /팀배정 기준인 10명은 warm p99가 수 ms 이내여야 합니다.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from utils.balance import MAX_BALANCED_PLAYERS, balance_teams, split_masks
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run(repeat: int) -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'players':>7} {'splits':>8} {'cold':>10} {'warm p50':>10} {'warm p99':>10}")
+    for n_players in range(10, MAX_BALANCED_PLAYERS + 1, 2):
+        split_masks.cache_clear()
+        ratings = rng.normal(1500, 200, n_players)
+
+        started = time.perf_counter()
+        balance_teams(ratings, temperature=25, rng=rng)
+        cold = time.perf_counter() - started
+
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            balance_teams(ratings, temperature=25, rng=rng)
+            samples.append(time.perf_counter() - started)
+
+        print(
+            f"{n_players:>7} {len(split_masks(n_players)):>8} {cold * 1000:>8.2f}ms "
+            f"{statistics.median(samples) * 1000:>8.3f}ms {percentile(samples, 99) * 1000:>8.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    run(parser.parse_args().repeat)
@@ -0,0 +1,142 @@
+"""
+Discord 없이 cog 핸들러를 실행하기 위한 최소한의 대역 객체.
+
+핸들러가 실제로 사용하는 속성과 메서드만 흉내 내고, 보낸 응답은 `sent`에 모아 둡니다.
+HTTP 요청은 하지 않고, StubHTTP를 넘기면 응답마다 Discord API 왕복 시간만큼 기다립니다.
+"""
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import random
+
+
+class StubHTTP:
+    """ Discord HTTP 계층 대역: 요청 수를 세고 왕복 시간(latency ± jitter)만큼 기다림 """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rng: random.Random = None) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = rng or random.Random(0)
+        self.requests = Counter()
+
+    async def request(self, route: str) -> None:
+        self.requests[route] += 1
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class FakeUser:
+    id: int
+    display_name: str
+    voice: object = None
+
+    @property
+    def name(self) -> str:
+        return self.display_name
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+
+@dataclass
+class FakeGuild:
+    id: int
+    name: str = "benchmark"
+    members: list = field(default_factory=list)
+
+
+@dataclass
+class FakeMessage:
+    components: list = field(default_factory=list)
+    http: StubHTTP = None
+
+    async def edit(self, **kwargs) -> None:
+        if self.http is not None:
+            await self.http.request("edit_message")
+
+
+class FakeResponse:
+    def __init__(self, sent: list, http: StubHTTP = None) -> None:
+        self.sent = sent
+        self.http = http
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, route: str, content, kwargs) -> None:
+        # 응답 요청을 보내는 순간부터 응답한 것으로 취급 (discord.py와 같음)
+        self._done = True
+        if self.http is not None:
+            await self.http.request(route)
+        self.sent.append((route, content, kwargs))
+
+    async def send_message(self, content=None, **kwargs) -> None:
+        await self._respond("send_message", content, kwargs)
+
+    async def defer(self, **kwargs) -> None:
+        await self._respond("defer", None, kwargs)
+
+    async def edit_message(self, **kwargs) -> None:
+        await self._respond("edit_message", None, kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, sent: list, http: StubHTTP = None) -> None:
+        self.sent = sent
+        self.http = http
+
+    async def send(self, content=None, **kwargs) -> FakeMessage:
+        if self.http is not None:
+            await self.http.request("followup")
+        self.sent.append(("followup", content, kwargs))
+        return FakeMessage(http=self.http)
+
+
+class FakeInteraction:
+    def __init__(self, client, user: FakeUser, guild: FakeGuild = None, message: FakeMessage = None,
+                 http: StubHTTP = None) -> None:
+        self.client = client
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id if guild is not None else None
+        self.message = message or FakeMessage(http=http)
+        self.extras = {}
+        self.sent = []
+        self.response = FakeResponse(self.sent, http)
+        self.followup = FakeFollowup(self.sent, http)
+
+    def is_expired(self) -> bool:
+        return False
+
+
+class FakeContext:
+    """ 프리픽스 명령어 컨텍스트처럼 동작 (interaction 없음) """
+
+    def __init__(self, bot, author: FakeUser, guild: FakeGuild, http: StubHTTP = None) -> None:
+        self.bot = bot
+        self.author = author
+        self.guild = guild
+        self.interaction = None
+        self.http = http
+        self.sent = []
+
+    async def send(self, content=None, **kwargs) -> FakeMessage:
+        if self.http is not None:
+            await self.http.request("send")
+        self.sent.append(("send", content, kwargs))
+        return FakeMessage(http=self.http)
+
+    async def defer(self, **kwargs) -> None:
+        pass
+
+
+class FakeBot:
+    def __init__(self, database, config: dict = None) -> None:
+        self.database = database
+        self.config = config or {}
+        self.ack_budget = 2.0
@@ -0,0 +1,358 @@
+"""
+상호작용 트레이스 재생 부하 생성기.
+
+    python -m benchmarks.replay --trace traces/interactions.jsonl.gz [--speed 10] [--http-latency-ms 80]
+    python -m benchmarks.replay --generate poll_burst|mvp_burst [--output replay.json]
+
+utils.traces가 기록한 트레이스(또는 합성 트레이스)를 원래 간격대로, --speed배 압축해서 실제 cog 핸들러에 넣습니다.
+Discord HTTP 계층은 StubHTTP로 대신하며, 응답 하나마다 --http-latency-ms만큼 기다립니다.
+
+재생 전에 트레이스에 맞춰 상태를 준비합니다.
+
+- 익명 사용자 ID는 처음 나온 순서대로 합성 멤버에, 익명 길드 ID는 순서대로 길드 1, 2, ...에 대응
+- vote_{date} 버튼의 날짜마다 길드별 투표 중 일정
+- mvp_vote:{schedule_id}:{user} 버튼의 일정마다 투표자와 후보로 10명을 채운 완료 경기와 MVP 투표 (1팀 승리)
+- 길드마다 참가 신청이 열린 확정 일정
+
+COMMANDS에 없는 명령어와 알 수 없는 버튼은 건너뛰고 개수만 보고합니다.
+
+보고 항목:
+- 핸들러별 종단 지연 (예정 시각부터 응답 완료까지, 루프가 밀려서 늦게 시작한 시간 포함)
+- 버튼 응답(ack) 지연과 자동 defer 횟수
+- DB 대기열 깊이 (실행 중이거나 기다리는 DatabaseManager 호출 수)와 커밋 대기 수
+- 보낸 HTTP 요청 수
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import discord
+
+from benchmarks.bench_team_balance import percentile
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeInteraction, FakeUser, StubHTTP
+from benchmarks.seed import GUILD_ID, member_id, member_name, seed_database
+from cogs.mvpmanagement import MVPManagement, MVPVoteButton
+from cogs.participants import ParticipantManagement
+from cogs.schedulevoting import ScheduleVoteButton, ScheduleVoting
+from database import DatabaseManager
+from utils import metrics
+from utils.traces import COMMAND, COMPONENT, read_trace
+
+VOTE_BUTTON = re.compile(r"vote_(?P<date>\d{4}-\d{2}-\d{2})")
+# 기록된 custom_id의 사용자 ID는 익명화되어 있으므로 숫자가 아닐 수 있음
+MVP_BUTTON = re.compile(r"mvp_vote:(?P<schedule_id>\d+):(?P<user>\w+)")
+
+# 재생하는 명령어: 이름 -> (cog 이름, 명령어 속성, 인자)
+COMMANDS = {
+    "참가": ("participants", "register_participant", ()),
+    "참가취소": ("participants", "unregister_participant", ()),
+    "참가자목록": ("participants", "list_participants", ()),
+    "승률": ("participants", "show_win_rate", ()),
+    "투표현황": ("voting", "show_vote_status", ()),
+    "mvp결과": ("mvp", "show_mvp_results", ()),
+}
+
+# 재생 중 DB 대기열을 샘플링하는 간격 (초)
+SAMPLE_INTERVAL = 0.005
+
+
+def generate_poll_burst(voters: int = 40, dates: int = 3, window: float = 5.0, rng_seed: int = 0) -> list:
+    """ 투표 메시지가 올라오자마자 voters명이 window초 안에 날짜 버튼을 1~dates개씩 누르는 트래픽 """
+    rng = random.Random(rng_seed)
+    choices = [f"2099-01-{day:02d}" for day in range(1, dates + 1)]
+    events = []
+    for voter in range(voters):
+        # 대부분 처음 몇 초 안에 몰림
+        clicked_at = rng.expovariate(3 / window)
+        for date in rng.sample(choices, rng.randint(1, dates)):
+            clicked_at += rng.uniform(0.2, 1.0)
+            events.append({"t": clicked_at, "k": COMPONENT, "n": f"vote_{date}", "u": f"u{voter}", "g": "g0"})
+    return sorted(events, key=lambda event: event["t"])
+
+
+def generate_mvp_burst(players: int = 10, window: float = 3.0, rng_seed: int = 0) -> list:
+    """ 경기가 끝나고 players명이 동시에 MVP 버튼을 누르는 트래픽 (이긴 팀 3표, 진 팀 1표) """
+    rng = random.Random(rng_seed)
+    users = [f"u{index}" for index in range(players)]
+    events = []
+    for index, voter in enumerate(users):
+        clicked_at = rng.uniform(0, window / 3)
+        for _ in range(3 if index < players // 2 else 1):
+            clicked_at += rng.uniform(0.1, 0.5)
+            voted_for = rng.choice([user for user in users if user != voter])
+            events.append({"t": clicked_at, "k": COMPONENT, "n": f"mvp_vote:1:{voted_for}", "u": voter, "g": "g0"})
+    return sorted(events, key=lambda event: event["t"])
+
+
+GENERATORS = {
+    "poll_burst": generate_poll_burst,
+    "mvp_burst": generate_mvp_burst,
+}
+
+
+class Replay:
+    def __init__(self, database: DatabaseManager, events: list, members: int, http: StubHTTP) -> None:
+        self.database = database
+        self.events = events
+        self.members = members
+        self.http = http
+        self.bot = FakeBot(database)
+        self.cogs = {
+            "participants": ParticipantManagement(self.bot),
+            "voting": ScheduleVoting(self.bot),
+            "mvp": MVPManagement(self.bot),
+        }
+        self.users = {}  # 익명 사용자 ID -> FakeUser
+        self.guilds = {}  # 익명 길드 ID -> FakeGuild
+        self.mvp_schedules = {}  # (길드, 기록된 일정 ID) -> 재생 DB의 일정 ID
+        self.latencies = {}  # 핸들러 -> 종단 지연 목록 (초)
+        self.errors = {}  # 핸들러 -> 실패 수
+        self.skipped = {}  # 이름 -> 건너뛴 수
+        self.depths = []
+        self.pending_commits = []
+
+    def user(self, anonymous_id: str) -> FakeUser:
+        user = self.users.get(anonymous_id)
+        if user is None:
+            index = len(self.users)
+            if index >= self.members:
+                raise ValueError(f"The trace has more than {self.members} users, raise --members")
+            user = self.users[anonymous_id] = FakeUser(int(member_id(index)), member_name(index))
+        return user
+
+    def guild(self, anonymous_id: str) -> FakeGuild:
+        guild = self.guilds.get(anonymous_id)
+        if guild is None:
+            guild = self.guilds[anonymous_id] = FakeGuild(GUILD_ID + len(self.guilds))
+        return guild
+
+    async def prepare(self) -> None:
+        """ 트레이스가 가리키는 투표 일정, MVP 투표, 참가 신청 일정을 만듦 (측정 대상 아님) """
+        vote_dates = set()
+        mvp_players = {}
+        for event in self.events:
+            guild = self.guild(event["g"])
+            user = self.user(event["u"])
+            if event["k"] != COMPONENT:
+                continue
+            if match := VOTE_BUTTON.fullmatch(event["n"]):
+                vote_dates.add((guild.id, match["date"]))
+            elif match := MVP_BUTTON.fullmatch(event["n"]):
+                players = mvp_players.setdefault((guild.id, match["schedule_id"]), [])
+                for player in (user, self.user(match["user"])):
+                    if player not in players:
+                        players.append(player)
+
+        for guild_id, date in sorted(vote_dates):
+            await self.database.insert_schedule(guild_id, date)
+
+        for (guild_id, schedule_id), players in mvp_players.items():
+            # 10명이 안 되면 다른 멤버로 채우고, 넘으면 나머지는 투표권 없는 사용자로 남김
+            filler = (self.user(f"filler-{guild_id}-{schedule_id}-{i}") for i in range(10))
+            players = (players + [player for player in filler if player not in players])[:10]
+            new_id = await self.database.insert_schedule(guild_id, "2099-12-31", status="confirmed")
+            for player in players:
+                await self.database.register_participant(new_id, str(player.id), player.display_name)
+            await self.database.assign_teams(
+                new_id, [(str(player.id),) for player in players[:5]], [(str(player.id),) for player in players[5:]]
+            )
+            await self.database.record_match_result(guild_id, new_id, 1)
+            await self.database.create_mvp_vote(new_id, 3, 1, True)
+            self.mvp_schedules[(guild_id, schedule_id)] = new_id
+
+        # 참가 신청 명령어가 가리킬 가장 최근 확정 일정
+        for guild in self.guilds.values():
+            await self.database.insert_schedule(guild.id, "2099-12-31", status="confirmed")
+
+    def handler(self, event: dict):
+        """ :return: (handler name, coroutine function taking the user and guild), or None for unknown events """
+        if event["k"] == COMMAND:
+            if event["n"] not in COMMANDS:
+                return None
+            cog_name, attribute, arguments = COMMANDS[event["n"]]
+            cog = self.cogs[cog_name]
+            command = getattr(cog, attribute)
+
+            async def run_command(user, guild):
+                ctx = FakeContext(self.bot, user, guild, self.http)
+                with metrics.registry.track("command", command.qualified_name):
+                    await command.callback(cog, ctx, *arguments)
+            return command.qualified_name, run_command
+
+        if match := VOTE_BUTTON.fullmatch(event["n"]):
+            button = ScheduleVoteButton(match["date"])
+            return "schedule_vote", lambda user, guild: button.callback(FakeInteraction(self.bot, user, guild, http=self.http))
+        if match := MVP_BUTTON.fullmatch(event["n"]):
+            schedule_id = self.mvp_schedules[(self.guilds[event["g"]].id, match["schedule_id"])]
+            voted_for = self.user(match["user"])
+            button = MVPVoteButton(
+                schedule_id, voted_for.id, voted_for.display_name, discord.ButtonStyle.green
+            )
+            return "mvp_vote", lambda user, guild: button.callback(FakeInteraction(self.bot, user, guild, http=self.http))
+        return None
+
+    async def _play(self, name: str, run, user: FakeUser, guild: FakeGuild, scheduled: float) -> None:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        try:
+            await run(user, guild)
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        self.latencies.setdefault(name, []).append(time.perf_counter() - scheduled)
+
+    async def _sample(self) -> None:
+        while True:
+            self.depths.append(sum(count for (kind, _), count in metrics.registry.in_flight.items() if kind == "db"))
+            self.pending_commits.append(self.database.get_commit_stats()["pending"])
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    async def run(self, speed: float) -> float:
+        """ :return: The wall time of the replay in seconds. """
+        tasks = []
+        sampler = asyncio.create_task(self._sample())
+        started = time.perf_counter()
+        first = self.events[0]["t"] if self.events else 0.0
+        for event in self.events:
+            handler = self.handler(event)
+            if handler is None:
+                self.skipped[event["n"]] = self.skipped.get(event["n"], 0) + 1
+                continue
+            name, run = handler
+            scheduled = started + (event["t"] - first) / speed
+            tasks.append(asyncio.create_task(
+                self._play(name, run, self.users[event["u"]], self.guilds[event["g"]], scheduled)
+            ))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        await self.database.vote_tally.flush()
+        return elapsed
+
+    def close(self) -> None:
+        self.cogs["voting"].chart_renderer.shutdown()
+
+
+def summarize_latencies(samples: list) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def summarize_latencies_from_histogram(histogram) -> dict:
+    return {
+        "count": histogram.count,
+        "p50_ms": histogram.quantile(0.5) * 1000,
+        "p99_ms": histogram.quantile(0.99) * 1000,
+        "max_ms": histogram.max * 1000,
+    }
+
+
+def summarize_depths(samples: list) -> dict:
+    if not samples:
+        return {"max": 0, "mean": 0.0, "p99": 0}
+    return {"max": max(samples), "mean": statistics.mean(samples), "p99": percentile(samples, 99)}
+
+
+async def run(args) -> dict:
+    metrics.registry.slow_threshold = math.inf
+    if args.trace:
+        events = read_trace(args.trace)
+        source = str(args.trace)
+    else:
+        events = GENERATORS[args.generate](rng_seed=args.seed)
+        source = args.generate
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "replay.db"
+        await seed_database(path, members=args.members, schedules=args.schedules, votes=args.votes, rng_seed=args.seed)
+        database = await DatabaseManager.open(path, group_commit=args.group_commit)
+        http = StubHTTP(args.http_latency_ms / 1000, args.http_jitter_ms / 1000, random.Random(args.seed))
+        replay = Replay(database, events, args.members, http)
+        try:
+            await replay.prepare()
+            elapsed = await replay.run(args.speed)
+        finally:
+            replay.close()
+            await database.close()
+
+    acks = {
+        name: summarize_latencies_from_histogram(histogram)
+        for (kind, name), histogram in metrics.registry.latency.items() if kind == "ack"
+    }
+    return {
+        "meta": {
+            "source": source,
+            "events": len(events),
+            "speed": args.speed,
+            "http_latency_ms": args.http_latency_ms,
+            "http_jitter_ms": args.http_jitter_ms,
+            "group_commit": args.group_commit,
+            "seed": args.seed,
+        },
+        "wall_s": elapsed,
+        "handlers": {name: summarize_latencies(samples) for name, samples in replay.latencies.items()},
+        "errors": replay.errors,
+        "skipped": replay.skipped,
+        "ack": acks,
+        "ack_deferred": {
+            name: count for (metric, _, name), count in metrics.registry.counters.items() if metric == "ack_deferred"
+        },
+        "db_queue_depth": summarize_depths(replay.depths),
+        "db_pending_commits": summarize_depths(replay.pending_commits),
+        "http_requests": dict(http.requests),
+    }
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"Replayed {meta['events']} events from {meta['source']} at {meta['speed']}x in {report['wall_s']:.2f}s")
+    print(f"{'handler':<16} {'n':>6} {'p50':>10} {'p99':>10} {'max':>10} {'errors':>7}")
+    for name, result in report["handlers"].items():
+        print(
+            f"{name:<16} {result['count']:>6} {result['p50_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms "
+            f"{result['max_ms']:>8.2f}ms {report['errors'].get(name, 0):>7}"
+        )
+    for name, result in report["ack"].items():
+        print(
+            f"ack {name:<12} {result['count']:>6} {result['p50_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms "
+            f"{result['max_ms']:>8.2f}ms  deferred {report['ack_deferred'].get(name, 0)}"
+        )
+    depth, pending = report["db_queue_depth"], report["db_pending_commits"]
+    print(f"DB queue depth: max {depth['max']}, mean {depth['mean']:.2f}, p99 {depth['p99']}")
+    print(f"DB pending commits: max {pending['max']}, mean {pending['mean']:.2f}")
+    print(f"HTTP requests: {report['http_requests']}")
+    if report["skipped"]:
+        print(f"Skipped: {report['skipped']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", type=Path, help="A trace recorded by utils.traces")
+    source.add_argument("--generate", choices=list(GENERATORS), help="Replay a synthetic traffic shape instead")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression factor of the trace")
+    parser.add_argument("--http-latency-ms", type=float, default=80.0)
+    parser.add_argument("--http-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--members", type=int, default=1_000)
+    parser.add_argument("--schedules", type=int, default=200)
+    parser.add_argument("--votes", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--group-commit", action="store_true")
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nWrote {args.output}")
@@ -0,0 +1,120 @@
+"""
+벤치마크용 합성 데이터베이스 생성.
+
+마이그레이션을 적용한 빈 SQLite 파일에 한 길드의 기록을 채웁니다.
+
+- 멤버 members명 (player_stats)
+- 일정 schedules개: 마지막 voting_schedules개는 투표 중, 나머지의 90%는 10명이 참가한 완료 경기, 10%는 취소
+- 일정 투표 votes개를 일정마다 고르게 (schedule_votes)
+- 완료 경기의 결과와 원장(match_results, match_player_results), 원장으로 집계한 전적과 레이팅
+
+같은 rng_seed면 항상 같은 데이터가 만들어집니다.
+"""
+
+import datetime
+import random
+
+import aiosqlite
+
+from database import DatabaseManager
+from database.migrate import migrate
+
+GUILD_ID = 1
+FIRST_USER_ID = 10**17
+START_DATE = datetime.date(2023, 1, 1)
+
+
+def member_id(index: int) -> str:
+    return str(FIRST_USER_ID + index)
+
+
+def member_name(index: int) -> str:
+    return f"플레이어{index:05d}"
+
+
+async def seed_database(path, members: int = 10_000, schedules: int = 1_000, votes: int = 100_000,
+                        voting_schedules: int = 5, rng_seed: int = 0) -> dict:
+    """
+    :return: The number of rows written per table, stored in the benchmark results.
+    """
+    rng = random.Random(rng_seed)
+    guild_id = str(GUILD_ID)
+    user_ids = [member_id(i) for i in range(members)]
+    names = {member_id(i): member_name(i) for i in range(members)}
+
+    schedule_rows = []
+    participant_rows = []
+    match_rows = []
+    ledger_rows = []
+    for index in range(schedules):
+        schedule_id = index + 1
+        date = (START_DATE + datetime.timedelta(days=index)).isoformat()
+        created_at = f"{date} 12:00:00"
+        if index >= schedules - voting_schedules:
+            status = "voting"
+        elif rng.random() < 0.9:
+            status = "completed"
+        else:
+            status = "cancelled"
+        schedule_rows.append((schedule_id, guild_id, date, "20:00", status, created_at))
+
+        if status == "completed":
+            players = rng.sample(user_ids, 10)
+            winning_team = rng.choice((1, 2))
+            match_id = len(match_rows) + 1
+            match_rows.append((match_id, schedule_id, winning_team, created_at))
+            for position, user_id in enumerate(players):
+                team = 1 if position < 5 else 2
+                participant_rows.append((schedule_id, user_id, names[user_id], team))
+                ledger_rows.append((match_id, schedule_id, guild_id, user_id, team, int(team == winning_team)))
+
+    vote_rows = []
+    per_schedule = votes // schedules
+    for index in range(schedules):
+        for user_id in rng.sample(user_ids, per_schedule):
+            vote_rows.append((index + 1, user_id, names[user_id]))
+
+    records = {user_id: [0, 0] for user_id in user_ids}
+    for *_, user_id, _, won in ledger_rows:
+        records[user_id][0 if won else 1] += 1
+
+    async with aiosqlite.connect(path) as connection:
+        await migrate(connection)
+        await connection.executemany(
+            "INSERT INTO schedules (id, guild_id, date, time, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            schedule_rows,
+        )
+        await connection.executemany(
+            "INSERT INTO participants (schedule_id, user_id, user_name, team) VALUES (?, ?, ?, ?)",
+            participant_rows,
+        )
+        await connection.executemany(
+            "INSERT INTO match_results (id, schedule_id, winning_team, match_date) VALUES (?, ?, ?, ?)",
+            match_rows,
+        )
+        await connection.executemany(
+            "INSERT INTO match_player_results (match_id, schedule_id, guild_id, user_id, team, won) VALUES (?, ?, ?, ?, ?, ?)",
+            ledger_rows,
+        )
+        await connection.executemany(
+            "INSERT INTO schedule_votes (schedule_id, user_id, user_name) VALUES (?, ?, ?)",
+            vote_rows,
+        )
+        await connection.executemany(
+            "INSERT INTO player_stats (guild_id, user_id, user_name, wins, losses) VALUES (?, ?, ?, ?, ?)",
+            [(guild_id, user_id, names[user_id], wins, losses) for user_id, (wins, losses) in records.items()],
+        )
+        await connection.commit()
+
+    # 레이팅은 원장을 재생해서 채움
+    database = await DatabaseManager.open(path, read_pool_size=0)
+    await database.ratings.rebuild(guild_id)
+    await database.close()
+
+    return {
+        "members": members,
+        "schedules": len(schedule_rows),
+        "completed_matches": len(match_rows),
+        "participants": len(participant_rows),
+        "schedule_votes": len(vote_rows),
+    }
@@ -1,3 +1,5 @@
+import asyncio
+import hashlib
 import json
 import logging
 import os
@@ -5,6 +7,7 @@ from pathlib import Path
 import platform
 import random
 import sys
+import time
 
 import aiosqlite
 import discord
@@ -13,6 +16,12 @@ from discord.ext.commands import Context
 from dotenv import load_dotenv
 
 from database import DatabaseManager
+from database.migrate import get_schema_version, migrate, verify_query_plans
+from utils import metrics
+from utils.interactions import AckGuard, GuardedContext
+from utils.logs import setup_logging
+from utils.traces import TraceRecorder
+from utils.watchdog import LoopWatchdog
 
 # 현재 스크립트의 디렉토리 경로를 Path 객체로 설정
 ROOT_DIR = Path(__file__).parent.resolve()
@@ -61,57 +70,14 @@ intents.message_content = True
 intents.members = True
 
 
-# Setup both of the loggers
-class LoggingFormatter(logging.Formatter):
-    # Colors
-    black = "\x1b[30m"
-    red = "\x1b[31m"
-    green = "\x1b[32m"
-    yellow = "\x1b[33m"
-    blue = "\x1b[34m"
-    gray = "\x1b[38m"
-    # Styles
-    reset = "\x1b[0m"
-    bold = "\x1b[1m"
-
-    COLORS = {
-        logging.DEBUG: gray + bold,
-        logging.INFO: blue + bold,
-        logging.WARNING: yellow + bold,
-        logging.ERROR: red,
-        logging.CRITICAL: red + bold,
-    }
-
-    def format(self, record):
-        log_color = self.COLORS[record.levelno]
-        format = "(black){asctime}(reset) (levelcolor){levelname:<8}(reset) (green){name}(reset) {message}"
-        format = format.replace("(black)", self.black + self.bold)
-        format = format.replace("(reset)", self.reset)
-        format = format.replace("(levelcolor)", log_color)
-        format = format.replace("(green)", self.green + self.bold)
-        formatter = logging.Formatter(format, "%Y-%m-%d %H:%M:%S", style="{")
-        return formatter.format(record)
-
-
 logger = logging.getLogger("discord_bot")
-logger.setLevel(logging.INFO)
 
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(LoggingFormatter())
-# File handler
-file_handler = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
-file_handler_formatter = logging.Formatter(
-    "[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"
-)
-file_handler.setFormatter(file_handler_formatter)
 
-# Add the handlers
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# 여러 서버에서 쓰일 때는 AutoShardedBot으로 실행해서 길드를 샤드(게이트웨이 연결)별로 나눠 처리
+BotBase = commands.AutoShardedBot if config.get("sharded", False) else commands.Bot
 
 
-class DiscordBot(commands.Bot):
+class DiscordBot(BotBase):
     def __init__(self) -> None:
         super().__init__(
             command_prefix=commands.when_mentioned_or(config["prefix"]),
@@ -132,43 +98,148 @@ class DiscordBot(commands.Bot):
         self.database = None
         self.ROOT_DIR = ROOT_DIR
         self.DB_FILE_NAME = "database.db"
-        self.SCHEMA_FILE_NAME = "schema.sql"
         self.DB_PATH = self.ROOT_DIR / "database" / self.DB_FILE_NAME
-        self.SCHEMA_PATH = self.ROOT_DIR / "database" / self.SCHEMA_FILE_NAME
+        self.MIGRATIONS_PATH = self.ROOT_DIR / "database" / "migrations"
+        self.MEMBER_SYNC_KEY = "member_sync"
+        self._cog_setup_seconds = 0.0
+        # FORCE_SYNC=1 이면 지문이 같아도 명령어 트리 동기화와 아바타 업로드를 다시 수행
+        self.force_sync = os.getenv("FORCE_SYNC", "").lower() in ("1", "true", "yes")
         self.default_activity = discord.CustomActivity(name="✋ DisQuadBot by 허태")
+        # 상호작용에 이 시간 안에 응답하지 못하면 자동으로 defer (Discord 기한은 3초)
+        self.ack_budget = config.get("interactions", {}).get("ack_budget_ms", 2000) / 1000
+        metrics_config = config.get("metrics", {})
+        metrics.registry.slow_threshold = metrics_config.get("slow_ms", 500) / 1000
+        self.metrics_server = None
+        watchdog_config = config.get("watchdog", {})
+        self.watchdog = LoopWatchdog(
+            interval=watchdog_config.get("interval_ms", 100) / 1000,
+            stall_threshold=watchdog_config.get("stall_ms", 250) / 1000,
+        ) if watchdog_config.get("enabled", True) else None
+        # 부하 재현용 상호작용 트레이스 (기본 꺼짐, 사용자/길드 ID는 익명화)
+        traces_config = config.get("traces", {})
+        self.trace_recorder = TraceRecorder(
+            self.ROOT_DIR / traces_config.get("path", "traces/interactions.jsonl.gz"),
+            salt=os.getenv("TRACE_SALT"),
+        ) if traces_config.get("enabled", False) else None
 
     async def init_db(self) -> None:
+        """
+        Apply pending schema migrations and warn when a hot-path query no longer uses its index.
+        """
         async with aiosqlite.connect(self.DB_PATH) as db:
-            with open(self.SCHEMA_PATH, encoding='utf-8') as file:
-                await db.executescript(file.read())
-            await db.commit()
+            applied = await migrate(db, self.MIGRATIONS_PATH)
+            plan_problems = await verify_query_plans(db)
+            version = await get_schema_version(db)
+        for problem in plan_problems:
+            self.logger.warning(problem)
+        if applied:
+            self.logger.info(f"Applied database migrations {applied}, schema version is now {version}")
+        else:
+            self.logger.info(f"Database schema is up to date (version {version})")
             
-    async def init_player_stats(self) -> None:
-        for guild in self.guilds:
-            for member in guild.members:
-                # 데이터베이스에서 해당 유저의 정보가 있는지 확인
-                existing_user = await self.database.get_user_id(member.id)
-                
-                # 정보가 없으면 추가
-                if existing_user is None:
-                    await self.database.add_user(member.id, member.display_name)
+    async def adopt_legacy_data(self) -> None:
+        """
+        Assign rows written before guild partitioning to a guild.
+
+        Those rows can only be attributed unambiguously while the bot is in exactly one guild,
+        otherwise they are left untouched and reported.
+        """
+        if len(self.guilds) == 1:
+            guild = self.guilds[0]
+            adopted = await self.database.adopt_legacy_rows(guild.id)
+            if adopted:
+                self.logger.info(f"Adopted {adopted} pre-partitioning rows into {guild.name} (ID: {guild.id})")
+        elif legacy_rows := await self.database.count_legacy_rows():
+            self.logger.warning(
+                f"{legacy_rows} pre-partitioning rows have no guild and are hidden, "
+                f"run once with the bot in a single guild to adopt them"
+            )
+
+    async def init_player_stats(self, guild: discord.Guild) -> None:
+        """
+        Sync the members of a guild into player_stats in a single transaction.
+
+        The member set is fingerprinted and compared with the watermark stored by the last sync of that guild,
+        so gateway reconnects skip the work entirely when membership has not changed.
+
+        :param guild: The guild whose members should be synced.
+        """
+        members = {str(member.id): member.display_name for member in guild.members}
+        changed = await self.database.sync_members(guild.id, members, f"{self.MEMBER_SYNC_KEY}:{guild.id}")
+        if changed is not None:
+            self.logger.info(
+                f"Synced {changed} of {len(members)} members of {guild.name} (ID: {guild.id}) into player_stats"
+            )
 
     async def load_cogs(self) -> None:
         """
         The code in this function is executed whenever the bot will start.
         """
         cogs_dir = self.ROOT_DIR / "cogs"
-        for file_path in cogs_dir.iterdir():
+        report = []
+        for file_path in sorted(cogs_dir.iterdir()):
             if file_path.suffix == ".py":
                 cog_name = file_path.stem
+                self._cog_setup_seconds = 0.0
+                started = time.perf_counter()
                 try:
                     await self.load_extension(f"cogs.{cog_name}")
+                    elapsed = time.perf_counter() - started
+                    report.append((cog_name, elapsed - self._cog_setup_seconds, self._cog_setup_seconds))
                     self.logger.info(f"Loaded extension '{cog_name}'")
                 except Exception as e:
                     exception = f"{type(e).__name__}: {e}"
                     self.logger.error(
                         f"Failed to load extension {cog_name}\n❌ {exception}"
                     )
+        self.log_startup_report(report)
+
+    async def add_cog(self, cog: commands.Cog, /, **kwargs) -> None:
+        """
+        Time every cog registration so the startup report can tell `setup` apart from the module import.
+        """
+        started = time.perf_counter()
+        await super().add_cog(cog, **kwargs)
+        self._cog_setup_seconds += time.perf_counter() - started
+
+    def log_startup_report(self, report: list) -> None:
+        """
+        Log the import and setup duration of every loaded cog, slowest first.
+
+        :param report: A list of (cog_name, import_seconds, setup_seconds) tuples.
+        """
+        lines = [f"{'cog':<20} {'import':>10} {'setup':>10}"]
+        for cog_name, import_seconds, setup_seconds in sorted(report, key=lambda row: row[1] + row[2], reverse=True):
+            lines.append(f"{cog_name:<20} {import_seconds * 1000:>8.1f}ms {setup_seconds * 1000:>8.1f}ms")
+        total = sum(import_seconds + setup_seconds for _, import_seconds, setup_seconds in report)
+        lines.append(f"{'total':<20} {total * 1000:>19.1f}ms")
+        self.logger.info("Cog startup report\n" + "\n".join(lines))
+
+    @tasks.loop(minutes=10.0)
+    async def log_metrics_summary(self) -> None:
+        """
+        Periodically log the slowest commands, callbacks and queries.
+        """
+        if metrics.registry.latency:
+            self.logger.info("Latency metrics\n" + metrics.registry.summary())
+
+    async def start_metrics(self) -> None:
+        """
+        Expose the latency metrics on the local Prometheus endpoint and start the periodic log summary.
+        """
+        metrics_config = self.config.get("metrics", {})
+        metrics.registry.add_gauge("gateway_latency_seconds", lambda: self.latency)
+        metrics.registry.add_gauge("db_pending_commits", lambda: self.database.get_commit_stats()["pending"])
+        if metrics_config.get("port"):
+            self.metrics_server = metrics.MetricsServer(metrics_config.get("host", "127.0.0.1"), metrics_config["port"])
+            try:
+                await self.metrics_server.start()
+                self.logger.info(f"Serving metrics on http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+            except OSError as e:
+                self.metrics_server = None
+                self.logger.warning(f"Could not start the metrics endpoint\n❌ {type(e).__name__}: {e}")
+        self.log_metrics_summary.change_interval(minutes=metrics_config.get("summary_minutes", 10))
+        self.log_metrics_summary.start()
 
     # @tasks.loop(minutes=1.0)
     # async def status_task(self) -> None:
@@ -202,6 +273,8 @@ class DiscordBot(commands.Bot):
         """
         This will just be executed when the bot starts the first time.
         """
+        if self.watchdog is not None:
+            self.watchdog.start()
         self.logger.info(f"Logged in as {self.user.name}")
         self.logger.info(f"discord.py API version: {discord.__version__}")
         self.logger.info(f"Python version: {platform.python_version()}")
@@ -212,12 +285,19 @@ class DiscordBot(commands.Bot):
         await self.init_db()
         await self.load_cogs()
         # self.status_task.start()
-        self.database = DatabaseManager(
-            connection=await aiosqlite.connect(self.DB_PATH)
+        database_config = self.config.get("database", {})
+        self.database = await DatabaseManager.open(
+            self.DB_PATH,
+            read_pool_size=database_config.get("read_pool_size", 2),
+            synchronous=database_config.get("synchronous", "FULL"),
+            group_commit=database_config.get("group_commit", False),
+            commit_window=database_config.get("commit_window_ms", 5) / 1000,
+            commit_max_batch=database_config.get("commit_max_batch", 32),
         )
         # self.update_nicknames.start()
-        await self.tree.sync()
-        await self.set_avatar("asset/avatar.png") 
+        await self.start_metrics()
+        await self.sync_app_commands(force=self.force_sync)
+        await self.set_avatar(self.ROOT_DIR / "asset" / "avatar.png", force=self.force_sync)
 
     # async def update_presence(self, context: Context) -> None:
     #     """
@@ -235,11 +315,49 @@ class DiscordBot(commands.Bot):
     #     if current_activity:
     #         await self.change_presence(activity=current_activity)
         
+    async def get_context(self, origin, /, *, cls=GuardedContext):
+        """
+        Build every command context as a GuardedContext and start the ack guard of slash command invocations.
+        """
+        context = await super().get_context(origin, cls=cls)
+        if context.interaction is not None and context.ack_guard is None:
+            handler = context.command.qualified_name if context.command else context.interaction.command.name
+            AckGuard(context.interaction, handler, budget=self.ack_budget).start()
+        return context
+
     async def on_ready(self) -> None:
-        await self.init_player_stats()
-        self.logger.info(f"{self.user.name} has connected to Discord!")
+        await self.adopt_legacy_data()
+        for guild in self.guilds:
+            await self.init_player_stats(guild)
+        self.logger.info(f"{self.user.name} has connected to Discord! ({len(self.guilds)} guilds, {self.shard_count or 1} shards)")
         await self.change_presence(activity=self.default_activity)
 
+    async def on_interaction(self, interaction: discord.Interaction) -> None:
+        if self.trace_recorder is not None:
+            self.trace_recorder.record(interaction)
+
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        await self.init_player_stats(guild)
+
+    async def close(self) -> None:
+        """
+        Flush any pending group-committed writes before the process exits.
+        """
+        await super().close()
+        self.log_metrics_summary.cancel()
+        if self.watchdog is not None:
+            await self.watchdog.stop()
+        if self.trace_recorder is not None:
+            await self.trace_recorder.close()
+            self.logger.info(f"Recorded {self.trace_recorder.recorded} interactions to {self.trace_recorder.path}")
+        if self.database is not None:
+            await self.database.close()
+            self.logger.info(f"Database closed, commit stats: {self.database.get_commit_stats()}")
+            self.logger.info(f"Schedule cache stats: {self.database.schedule_cache.stats}")
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        self.logger.info("Latency metrics\n" + metrics.registry.summary())
+
     async def on_message(self, message: discord.Message) -> None:
         """
         The code in this event is executed every time someone sends a message, with or without the prefix
@@ -250,12 +368,26 @@ class DiscordBot(commands.Bot):
             return
         await self.process_commands(message)
 
+    async def on_command(self, context: Context) -> None:
+        """
+        Start timing a command as soon as it is dispatched, the timing ends on completion or error.
+        """
+        context.metrics_token = metrics.registry.begin("command", context.command.qualified_name)
+
+    def end_command_metrics(self, context: Context, error: bool = False) -> None:
+        token = getattr(context, "metrics_token", None)
+        if token is not None:
+            context.metrics_token = None
+            metrics.registry.end(token, error)
+
     async def on_command_completion(self, context: Context) -> None:
         """
         The code in this event is executed every time a normal command has been *successfully* executed.
 
         :param context: The context of the command that has been executed.
         """
+        context.release_ack_guard()
+        self.end_command_metrics(context)
         full_command_name = context.command.qualified_name
         split = full_command_name.split(" ")
         executed_command = str(split[0])
@@ -276,6 +408,8 @@ class DiscordBot(commands.Bot):
         :param context: The context of the normal command that failed executing.
         :param error: The error that has been faced.
         """
+        context.release_ack_guard()
+        self.end_command_metrics(context, error=True)
         if isinstance(error, commands.CommandOnCooldown):
             minutes, seconds = divmod(error.retry_after, 60)
             hours, minutes = divmod(minutes, 60)
@@ -298,6 +432,11 @@ class DiscordBot(commands.Bot):
                 self.logger.warning(
                     f"{context.author} (ID: {context.author.id}) tried to execute an owner only command in the bot's DMs, but the user is not an owner of the bot."
                 )
+        elif isinstance(error, commands.NoPrivateMessage):
+            embed = discord.Embed(
+                description="This command can only be used in a server!", color=0xE02B2B
+            )
+            await context.send(embed=embed)
         elif isinstance(error, commands.MissingPermissions):
             embed = discord.Embed(
                 description="You are missing the permission(s) `"
@@ -325,17 +464,76 @@ class DiscordBot(commands.Bot):
         else:
             raise error
 
-    async def set_avatar(self, avatar_path: str) -> None:
-        """Set the bot's avatar."""
-        with open(avatar_path, 'rb') as avatar_file:
-            avatar_data = avatar_file.read()
+    async def run_if_changed(self, key: str, fingerprint: str, action, force: bool = False) -> None:
+        """
+        Run a slow, rate-limited startup call only when its input changed since the last successful run.
+
+        :param key: The sync_state key the fingerprint is stored under.
+        :param fingerprint: The hash of the input of the call.
+        :param action: A coroutine function performing the call.
+        :param force: Run the call even when the fingerprint is unchanged.
+        """
+        duration_key = f"{key}:seconds"
+        if not force and fingerprint == await self.database.get_sync_state(key):
+            last_duration = float(await self.database.get_sync_state(duration_key) or 0)
+            self.logger.info(f"Skipped {key}, unchanged since last run (saved ~{last_duration:.2f}s)")
+            return
+
+        started = time.perf_counter()
+        await action()
+        elapsed = time.perf_counter() - started
+        await self.database.set_sync_state(key, fingerprint)
+        await self.database.set_sync_state(duration_key, f"{elapsed:.3f}")
+        self.logger.info(f"Finished {key} in {elapsed:.2f}s")
+
+    async def sync_app_commands(self, force: bool = False) -> None:
+        """
+        Sync the application command tree, skipping the HTTP call when the serialized tree is unchanged.
+
+        :param force: Sync even when the tree fingerprint is unchanged.
+        """
+        payload = {
+            "application_id": self.application_id,
+            "commands": sorted(
+                (command.to_dict(self.tree) for command in self.tree.get_commands()),
+                key=lambda command: (command.get("type", 1), command["name"]),
+            ),
+        }
+        fingerprint = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+        await self.run_if_changed("app_command_tree", fingerprint, self.tree.sync, force=force)
+
+    async def set_avatar(self, avatar_path: Path, force: bool = False) -> None:
+        """
+        Set the bot's avatar, skipping the heavily rate-limited upload when the image is unchanged.
+
+        :param avatar_path: The path of the avatar image.
+        :param force: Upload even when the image fingerprint is unchanged.
+        """
+        avatar_data = await asyncio.to_thread(Path(avatar_path).read_bytes)
+        fingerprint = hashlib.sha256(avatar_data).hexdigest()
+
+        async def upload() -> None:
             await self.user.edit(avatar=avatar_data)
             self.logger.info("Avatar has been updated.")
 
+        try:
+            await self.run_if_changed("avatar", fingerprint, upload, force=force)
+        except discord.HTTPException as e:
+            # 아바타 변경이 rate limit에 걸려도 봇 실행은 계속 (다음 실행 때 다시 시도)
+            self.logger.warning(f"Failed to update avatar: {e}")
+
+
+# 차트 워커 프로세스(spawn/forkserver)가 이 모듈을 다시 import 해도 봇과 로그 스레드가 또 시작되지 않도록 함
+if __name__ == "__main__":
+    # 로그는 큐를 거쳐 별도 스레드에서 콘솔, 교체되는 파일, (선택) JSONL로 기록
+    setup_logging(ROOT_DIR, config.get("logging", {}), names=("discord_bot", "discord"))
 
-# .env 파일 경로를 Path 객체로 처리
-env_path = ROOT_DIR / ".env"
-load_dotenv(env_path)
+    # .env 파일 경로를 Path 객체로 처리
+    env_path = ROOT_DIR / ".env"
+    load_dotenv(env_path)
 
-bot = DiscordBot()
-bot.run(os.getenv("TOKEN"))
+    bot = DiscordBot()
+    # discord.py 로그도 위의 파이프라인으로 보내므로 기본 핸들러는 붙이지 않음
+    bot.run(os.getenv("TOKEN"), log_handler=None)
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
 
+from utils.metrics import timed
+
 class HelpView(discord.ui.View):
     def __init__(self, embeds):
         super().__init__(timeout=None)
@@ -8,6 +10,7 @@ class HelpView(discord.ui.View):
         self.current_page = 0
 
     @discord.ui.button(label="이전", style=discord.ButtonStyle.secondary)
+    @timed("component", "help_previous_page")
     async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.current_page > 0:
             self.current_page -= 1
@@ -16,6 +19,7 @@ class HelpView(discord.ui.View):
             await interaction.response.defer()  # 응답을 지연시킵니다.
 
     @discord.ui.button(label="다음", style=discord.ButtonStyle.secondary)
+    @timed("component", "help_next_page")
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
         if self.current_page < len(self.embeds) - 1:
             self.current_page += 1
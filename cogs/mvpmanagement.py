@@ -3,14 +3,16 @@ from discord.ext import commands
 from discord import ui
 import datetime
 
+from database.ballots import NO_VOTES_LEFT, NOT_ELIGIBLE, OWN_TEAM
+from utils.fanout import DMDispatcher
+from utils.interactions import guarded, respond
+
 class MVPVoteView(ui.View):
-    def __init__(self, bot, schedule_id, participants, voter_team, max_votes, can_vote_own_team):
+    def __init__(self, schedule_id, participants, voter_team, can_vote_own_team):
         super().__init__(timeout=None)
-        self.bot = bot
         self.schedule_id = schedule_id
         self.participants = participants
         self.voter_team = voter_team
-        self.max_votes = max_votes
         self.can_vote_own_team = can_vote_own_team
         self._create_buttons()
         
@@ -22,60 +24,80 @@ class MVPVoteView(ui.View):
         # 팀 1(A) 버튼 추가
         if self.can_vote_own_team or self.voter_team != 1:
             for participant in team_a:
-                button = ui.Button(label=participant[1], custom_id=f"mvp_vote:{participant[0]}", style=discord.ButtonStyle.green)
-                button.callback = self.vote_callback
-                self.add_item(button)
+                self.add_item(MVPVoteButton(self.schedule_id, participant[0], participant[1], discord.ButtonStyle.green))
                 
         # 팀 2(B) 버튼 추가
         if self.can_vote_own_team or self.voter_team != 2:
             for participant in team_b:
-                button = ui.Button(label=participant[1], custom_id=f"mvp_vote:{participant[0]}", style=discord.ButtonStyle.red)
-                button.callback = self.vote_callback
-                self.add_item(button)
-    
-    async def vote_callback(self, interaction: discord.Interaction):
-        voted_for_id = interaction.data["custom_id"].split(":")[1]
+                self.add_item(MVPVoteButton(self.schedule_id, participant[0], participant[1], discord.ButtonStyle.red))
+
+
+# MVP 투표 버튼
+# 투표권 수 등 상태는 클릭할 때 custom_id(mvp_vote:{schedule_id}:{user_id})로 투표권 장부에서 찾으므로 재시작 후에도 동작함
+class MVPVoteButton(ui.DynamicItem[ui.Button], template=r"mvp_vote:(?P<schedule_id>\d+):(?P<user_id>\d+)"):
+    def __init__(self, schedule_id, voted_for_id, label, style):
+        super().__init__(
+            ui.Button(label=label, style=style, custom_id=f"mvp_vote:{schedule_id}:{voted_for_id}")
+        )
+        self.schedule_id = int(schedule_id)
+        self.voted_for_id = str(voted_for_id)
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(match["schedule_id"], match["user_id"], item.label, item.style)
+
+    @guarded("mvp_vote")
+    async def callback(self, interaction: discord.Interaction):
         voter_id = str(interaction.user.id)
         
-        # 이미 투표한 횟수 확인
-        used_votes = await self.bot.database.check_user_voted(self.schedule_id, voter_id)
+        # 투표권 장부에서 차감 후 기록 (남은 투표권이 없으면 DB에도 기록되지 않음)
+        result, remaining_votes = await interaction.client.database.mvp_ballots.cast(self.schedule_id, voter_id, self.voted_for_id)
         
-        if used_votes >= self.max_votes:
-            await interaction.response.send_message("❌ 모든 투표권을 사용했습니다.", ephemeral=True)
+        if result == NOT_ELIGIBLE:
+            await respond(interaction, "❌ 이 MVP 투표에 참여할 수 없습니다.", ephemeral=True)
+            return
+        if result == OWN_TEAM:
+            await respond(interaction, "❌ 자기 팀에는 투표할 수 없습니다.", ephemeral=True)
+            return
+        if result == NO_VOTES_LEFT:
+            await respond(interaction, "❌ 모든 투표권을 사용했습니다.", ephemeral=True)
             return
         
-        # 투표 기록
-        await self.bot.database.record_mvp_vote(self.schedule_id, voter_id, voted_for_id)
-        
-        # 남은 투표권 계산
-        remaining_votes = self.max_votes - used_votes - 1
-        
-        await interaction.response.send_message(
+        await respond(
+            interaction,
             f"✅ 투표가 완료되었습니다. 남은 투표권: {remaining_votes}표", 
             ephemeral=True
         )
         
-        # 모든 투표권을 사용했으면 뷰 비활성화
+        # 모든 투표권을 사용했으면 메시지의 버튼 비활성화
         if remaining_votes <= 0:
-            for item in self.children:
+            view = ui.View.from_message(interaction.message, timeout=None)
+            for item in view.children:
                 item.disabled = True
-            await interaction.message.edit(view=self)
+            # 종료된 뷰는 뷰 저장소에 보관되지 않음
+            view.stop()
+            await interaction.message.edit(view=view)
 
 
 class MVPManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.dm_dispatcher = DMDispatcher(bot, concurrency=bot.config.get("dm_concurrency", 5))
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(MVPVoteButton)
     
     @commands.hybrid_command(
         name="mvp투표",
         description="현재 경기의 MVP를 투표합니다. 옵션을 통해 투표 방식을 설정할 수 있습니다."
     )
+    @commands.guild_only()
     async def start_mvp_vote(self, ctx: commands.Context, 
                             이긴팀_투표수: int = 3, 
                             진팀_투표수: int = 1,
                             자기팀_투표가능: bool = True):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
         
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -110,17 +132,14 @@ class MVPManagement(commands.Cog):
         # 참가자 목록 조회
         participants = await self.bot.database.get_participants(schedule_id)
         
-        # 각 참가자에게 투표 안내 DM 발송
+        # 각 참가자에게 보낼 투표 안내 DM 구성 (버튼 구성은 팀별로 같으므로 뷰를 팀마다 하나만 만들어 재사용)
+        winning_team = match_result[0]
+        views = {}
+        messages = []
         for participant in participants:
             user_id, user_name, team = participant
             
-            # 사용자 객체 가져오기
-            user = self.bot.get_user(int(user_id))
-            if not user:
-                continue
-            
             # 팀에 따라 투표권 수 결정
-            winning_team = match_result[0]
             max_votes = 이긴팀_투표수 if team == winning_team else 진팀_투표수
             
             dm_embed = discord.Embed(
@@ -130,28 +149,29 @@ class MVPManagement(commands.Cog):
             )
             
             # 투표 UI 생성
-            view = MVPVoteView(
-                self.bot,
-                schedule_id,
-                participants,
-                team,
-                max_votes,
-                자기팀_투표가능
-            )
+            if team not in views:
+                views[team] = MVPVoteView(schedule_id, participants, team, 자기팀_투표가능)
             
-            try:
-                await user.send(embed=dm_embed, view=view)
-            except:
-                # DM을 보낼 수 없는 경우 처리
-                pass
+            messages.append((user_id, {"embed": dm_embed, "view": views[team]}))
+        
+        # DM 동시 발송 후 결과 요약
+        report = await self.dm_dispatcher.send_all(messages)
+        participant_names = {p[0]: p[1] for p in participants}
+        summary = f"📨 MVP 투표 DM 발송 완료: 성공 {len(report.delivered)}명 / 실패 {len(report.failed)}명"
+        if report.failed:
+            summary += "\n" + "\n".join(
+                f"- {participant_names.get(user_id, user_id)}: {reason}" for user_id, reason in report.failed
+            )
+        await ctx.send(summary)
     
     @commands.hybrid_command(
         name="mvp결과",
         description="현재 경기의 MVP 투표 결과를 확인합니다."
     )
+    @commands.guild_only()
     async def show_mvp_results(self, ctx: commands.Context):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
         
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -197,12 +217,13 @@ class MVPManagement(commands.Cog):
         name="오늘의mvp",
         description="오늘 진행된 모든 경기의 MVP 중에서 가장 많은 표를 받은 플레이어를 선정합니다."
     )
+    @commands.guild_only()
     async def today_mvp(self, ctx: commands.Context):
         # 오늘 날짜 가져오기
         today = datetime.datetime.now().strftime("%Y-%m-%d")
         
         # 오늘의 MVP 조회
-        mvp = await self.bot.database.get_today_mvp(today)
+        mvp = await self.bot.database.get_today_mvp(ctx.guild.id, today)
         
         if not mvp:
             await ctx.send("❌ 오늘 진행된 경기의 MVP 투표 결과가 없습니다.", ephemeral=True)
@@ -211,7 +232,7 @@ class MVPManagement(commands.Cog):
         mvp_id, mvp_name, total_votes = mvp
         
         # MVP 수상 기록
-        await self.bot.database.record_mvp_award(today, mvp_id, mvp_name, total_votes)
+        await self.bot.database.record_mvp_award(ctx.guild.id, today, mvp_id, mvp_name, total_votes)
         
         # 임베드 메시지로 오늘의 MVP 발표
         embed = discord.Embed(
@@ -226,4 +247,5 @@ class MVPManagement(commands.Cog):
         await ctx.send(embed=embed)
 
 async def setup(bot) -> None:
+    bot.add_dynamic_items(MVPVoteButton)
     await bot.add_cog(MVPManagement(bot))
\ No newline at end of file
@@ -1,18 +1,109 @@
+import asyncio
 import discord
 from discord.ext import commands
+import datetime
+import math
 import random
+from typing import Literal
+
+from database import ALREADY_REGISTERED, PARTICIPANTS_FULL
+from database.leaderboard import GAMES, RATING, WIN_RATE, PlayerRecord
+from utils.balance import MAX_BALANCED_PLAYERS, balance_teams, split_masks
+from utils.metrics import timed
+
+SORT_OPTIONS = {"승률": WIN_RATE, "판수": GAMES, "레이팅": RATING}
+
+
+def format_record(rank, record):
+    return (
+        f"`{rank:>3}` **{record.user_name}** — {record.win_rate * 100:.2f}% "
+        f"({record.wins}승 {record.losses}패) · 레이팅 {record.rating:.0f}"
+    )
+
+# 리더보드 페이지 뷰 (페이지를 넘길 때마다 메모리의 순위에서 해당 구간만 꺼내서 표시)
+# 그 사이 순위가 무효화되었을 수 있으므로 버튼마다 load()로 다시 구성 (구성되어 있으면 바로 반환)
+class LeaderboardView(discord.ui.View):
+    def __init__(self, leaderboard, guild_id, sort_key, title, per_page=10):
+        super().__init__(timeout=600)
+        self.leaderboard = leaderboard
+        self.guild_id = guild_id
+        self.sort_key = sort_key
+        self.title = title
+        self.per_page = per_page
+        self.current_page = 0
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(self.leaderboard.size(self.guild_id, self.sort_key) / self.per_page))
+
+    def create_embed(self):
+        self.current_page = min(self.current_page, self.page_count - 1)
+        entries = self.leaderboard.page(self.guild_id, self.sort_key, self.current_page, self.per_page)
+        embed = discord.Embed(
+            title=self.title,
+            description="\n".join(format_record(rank, record) for rank, record in entries) or "전적이 없습니다.",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(
+            text=f"{self.current_page + 1}/{self.page_count} 페이지 · 총 {self.leaderboard.size(self.guild_id, self.sort_key)}명"
+        )
+        return embed
+
+    @discord.ui.button(label="이전", style=discord.ButtonStyle.secondary)
+    @timed("component", "leaderboard_previous_page")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.leaderboard.load(self.guild_id)
+        if self.current_page > 0:
+            self.current_page -= 1
+            await interaction.response.edit_message(embed=self.create_embed(), view=self)
+        else:
+            await interaction.response.defer()
+
+    @discord.ui.button(label="다음", style=discord.ButtonStyle.secondary)
+    @timed("component", "leaderboard_next_page")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.leaderboard.load(self.guild_id)
+        if self.current_page < self.page_count - 1:
+            self.current_page += 1
+            await interaction.response.edit_message(embed=self.create_embed(), view=self)
+        else:
+            await interaction.response.defer()
+
 
 class ParticipantManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.team_a_name = "🟢 Team 1"
         self.team_b_name = "🔴 Team 2"
-
-    async def assign_teams_and_create_embed(self, schedule_id, user_list, title):
-        # 랜덤 팀 배정
-        random.shuffle(user_list)
-        team_a = user_list[:5]
-        team_b = user_list[5:]
+        self.max_participants = 10
+        self.balance_temperature = bot.config.get("team_balance_temperature", 25)
+
+    async def cog_load(self):
+        # 분할 마스크(20명 기준 수십 ms)를 루프 밖에서 미리 만들어 두어 첫 팀 배정이 루프를 막지 않도록 함
+        await asyncio.to_thread(lambda: [split_masks(n) for n in range(10, MAX_BALANCED_PLAYERS + 1, 2)])
+
+    async def get_ratings(self, guild_id, user_list):
+        """ 참가자별 레이팅 (경기 결과로 갱신되는 길드별 레이팅 캐시 기준) """
+        ratings = self.bot.database.ratings
+        await ratings.load(guild_id)
+        return [ratings.rating(guild_id, user[0]) for user in user_list]
+
+    async def assign_teams_and_create_embed(self, guild_id, schedule_id, user_list, title):
+        gap = None
+        if len(user_list) > MAX_BALANCED_PLAYERS:
+            # 인원이 너무 많으면 전수 평가 대신 랜덤 팀 배정
+            random.shuffle(user_list)
+            half = len(user_list) // 2
+            team_a = user_list[:half]
+            team_b = user_list[half:]
+        else:
+            # 레이팅 합 차이가 가장 작은 분할 선택 (홀수 인원이면 평균 레이팅의 빈자리를 채워서 계산)
+            ratings = await self.get_ratings(guild_id, user_list)
+            if len(ratings) % 2:
+                ratings.append(sum(ratings) / len(ratings))
+            team_a_indices, team_b_indices, gap = balance_teams(ratings, self.balance_temperature)
+            team_a = [user_list[i] for i in team_a_indices if i < len(user_list)]
+            team_b = [user_list[i] for i in team_b_indices if i < len(user_list)]
 
         # 팀 정보 데이터베이스에 저장
         await self.bot.database.assign_teams(schedule_id, team_a, team_b)
@@ -33,6 +124,8 @@ class ParticipantManagement(commands.Cog):
             value="\n".join(user[1] for user in team_b),
             inline=True
         )
+        if gap is not None:
+            embed.set_footer(text=f"예상 전력 차이: {gap:.0f}")
 
         return embed
 
@@ -40,9 +133,10 @@ class ParticipantManagement(commands.Cog):
         name="참가", 
         description="롤 내전 참가 신청을 합니다. 예를 들어, `/참가`를 입력하면 현재 확정된 내전 일정에 참가 신청이 완료됩니다."
     )
+    @commands.guild_only()
     async def register_participant(self, ctx: commands.Context):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
 
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -53,9 +147,11 @@ class ParticipantManagement(commands.Cog):
         user_id = str(ctx.author.id)
         user_name = ctx.author.display_name
 
-        # 이미 참가 신청했는지 확인
-        existing_participant = await self.bot.database.check_participant(schedule_id, user_id)
-        if existing_participant:
+        # 중복 확인, 정원 확인, 등록을 한 번에 처리
+        result, count = await self.bot.database.register_participant_if_open(
+            schedule_id, user_id, user_name, self.max_participants
+        )
+        if result == ALREADY_REGISTERED:
             embed = discord.Embed(
                 title="⚠️ 내전 참가 신청 오류",
                 description=f"**{user_name}**님, {schedule_date} 이미 참가 신청되어 있습니다.",
@@ -64,19 +160,14 @@ class ParticipantManagement(commands.Cog):
             await ctx.send(embed=embed, ephemeral=True)
             return
 
-        # 참가자 제한 확인 (10명)
-        participant_count = await self.bot.database.get_participant_count(schedule_id)
-        if participant_count[0] >= 10:
-            await ctx.send("❌ 참가 인원(10명)이 모두 찼습니다.", ephemeral=True)
+        if result == PARTICIPANTS_FULL:
+            await ctx.send(f"❌ 참가 인원({self.max_participants}명)이 모두 찼습니다.", ephemeral=True)
             return
 
-        # 참가자 등록
-        await self.bot.database.register_participant(schedule_id, user_id, user_name)
-
         # 임베드 메시지로 참가 확인
         embed = discord.Embed(
             title="✅ 내전 참가 신청 완료",
-            description=f"**{user_name}**님, {schedule_date} 내전 참가 신청이 완료되었습니다! ({participant_count[0] + 1}/10)",
+            description=f"**{user_name}**님, {schedule_date} 내전 참가 신청이 완료되었습니다! ({count}/{self.max_participants})",
             color=discord.Color.green()
         )
         await ctx.send(embed=embed, ephemeral=True)
@@ -85,9 +176,10 @@ class ParticipantManagement(commands.Cog):
         name="참가취소", 
         description="롤 내전 참가 신청을 취소합니다"
     )
+    @commands.guild_only()
     async def unregister_participant(self, ctx: commands.Context):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
 
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -97,15 +189,11 @@ class ParticipantManagement(commands.Cog):
 
         user_id = str(ctx.author.id)
 
-        # 참가 신청 여부 확인
-        existing_participant = await self.bot.database.check_participant(schedule_id, user_id)
-        if not existing_participant:
+        # 참가 취소 처리 (신청 내역이 없으면 아무것도 삭제되지 않음)
+        if not await self.bot.database.unregister_participant(schedule_id, user_id):
             await ctx.send("❌ 참가 신청 내역이 없습니다.", ephemeral=True)
             return
 
-        # 참가 취소 처리
-        await self.bot.database.unregister_participant(schedule_id, user_id)
-
         # 임베드 메시지로 취소 확인
         embed = discord.Embed(
             title="🚫 내전 참가 취소 완료",
@@ -118,9 +206,10 @@ class ParticipantManagement(commands.Cog):
         name="참가자목록", 
         description="현재 내전 참가자 목록을 확인합니다"
     )
+    @commands.guild_only()
     async def list_participants(self, ctx: commands.Context):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
 
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -175,11 +264,12 @@ class ParticipantManagement(commands.Cog):
 
     @commands.hybrid_command(
         name="팀배정", 
-        description="참가자들을 랜덤으로 팀 배정합니다"
+        description="참가자들을 전적 기반으로 밸런스를 맞춰 팀 배정합니다"
     )
+    @commands.guild_only()
     async def assign_teams(self, ctx: commands.Context):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
 
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -195,13 +285,14 @@ class ParticipantManagement(commands.Cog):
             return
 
         # 팀 배정 및 임베드 생성
-        embed = await self.assign_teams_and_create_embed(schedule_id, participants, f"🎲 {schedule_date} 내전 팀 배정 결과")
+        embed = await self.assign_teams_and_create_embed(ctx.guild.id, schedule_id, participants, f"🎲 {schedule_date} 내전 팀 배정 결과")
         await ctx.send(embed=embed)
 
     @commands.hybrid_command(
         name="즉흥팀배정",
-        description="현재 음성 채널에 있는 사용자들을 랜덤으로 두 팀으로 배정합니다"
+        description="현재 음성 채널에 있는 사용자들을 전적 기반으로 밸런스를 맞춰 두 팀으로 배정합니다"
     )
+    @commands.guild_only()
     async def spontaneous_team_assignment(self, ctx: commands.Context):
         # 사용자가 음성 채널에 있는지 확인
         if not ctx.author.voice or not ctx.author.voice.channel:
@@ -219,13 +310,14 @@ class ParticipantManagement(commands.Cog):
         # 사용자 ID와 이름 목록 생성
         user_list = [(member.id, member.display_name) for member in members]
 
-        # 참가자 등록
-        schedule_id = 0  # 즉흥적인 경우이므로 임시로 0을 사용
+        # 즉흥 경기도 길드별 일정으로 기록해서 다른 서버의 즉흥 팀 배정과 섞이지 않도록 함
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        schedule_id = await self.bot.database.insert_schedule(ctx.guild.id, today, status='spontaneous')
         for user_id, user_name in user_list:
             await self.bot.database.register_participant(schedule_id, user_id, user_name)
 
         # 팀 배정 및 임베드 생성
-        embed = await self.assign_teams_and_create_embed(schedule_id, user_list, "🎲 즉흥 팀 배정 결과")
+        embed = await self.assign_teams_and_create_embed(ctx.guild.id, schedule_id, user_list, "🎲 즉흥 팀 배정 결과")
         await ctx.send(embed=embed)
         
     # cogs/participants.py에 추가
@@ -234,9 +326,10 @@ class ParticipantManagement(commands.Cog):
         name="경기결과",
         description="경기가 끝난 후 승리한 팀을 입력하여 결과를 저장합니다. 예를 들어, `/경기결과 1`을 입력하면 팀 1이 승리한 것으로 기록됩니다."
     )
+    @commands.guild_only()
     async def record_match_result(self, ctx: commands.Context, winning_team: str):
         # 현재 확정된 가장 최근 일정 조회
-        schedule = await self.bot.database.get_confirmed_schedule()
+        schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
 
         if not schedule:
             await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
@@ -249,54 +342,69 @@ class ParticipantManagement(commands.Cog):
             await ctx.send("❌ 유효하지 않은 팀 번호입니다. 1 또는 2를 입력하세요.", ephemeral=True)
             return
 
-        await self.bot.database.record_match_result(schedule_id, int(winning_team))
+        await self.bot.database.record_match_result(ctx.guild.id, schedule_id, int(winning_team))
 
         # 경기 결과 저장 후 다음 일정 준비 및 승리한 팀 축하 메시지
-        await self.bot.database.update_schedule_status(schedule_id, 'completed')
+        await self.bot.database.update_schedule_status(ctx.guild.id, schedule_id, 'completed')
         winning_team_name = self.team_a_name if winning_team == "1" else self.team_b_name
         await ctx.send(f" 🥳🎉 **{winning_team_name}**이 승리하셨습니다. 축하드립니다~ 🎊🎈\n✅ 경기 결과가 저장되었습니다.", ephemeral=False)
         
     @commands.hybrid_command(
         name="승률",
-        description="플레이어의 승률을 출력합니다. 예를 들어, `/승률 user_name:준병이어머`를 입력하면 해당 사용자의 승률이 표시됩니다."
-        # description="⚠️ 구현중"
+        description="플레이어의 승률과 순위를 출력합니다. 예를 들어, `/승률 user_name:준병이어머`를 입력하면 해당 사용자의 승률이 표시됩니다."
     )
-    async def show_win_rate(self, ctx: commands.Context, user_name: str = None, team: str = None):
+    @commands.guild_only()
+    async def show_win_rate(self, ctx: commands.Context, user_name: str = None, team: str = None, 정렬: Literal["승률", "판수", "레이팅"] = "승률"):
+        leaderboard = self.bot.database.leaderboard
+        await leaderboard.load(ctx.guild.id)
+        sort_key = SORT_OPTIONS[정렬]
+
         if user_name:
-            # 특정 사용자의 승률 조회
-            user_id = self.bot.database.get_user_id_by_name(user_name=user_name)
-            stats = await self.bot.database.get_player_stats(user_id=user_id)
-            if not stats:
+            # 특정 사용자의 승률 및 순위 조회
+            user_id = await self.bot.database.get_user_id_by_name(ctx.guild.id, user_name)
+            record = leaderboard.get(ctx.guild.id, user_id) if user_id else None
+            if record is None or not record.games:
                 await ctx.send(f"❌ {user_name}님의 전적이 없습니다.", ephemeral=True)
                 return
-            wins, losses = stats[0][3], stats[0][4]
-            win_rate = (wins / (wins + losses)) * 100 if (wins + losses) > 0 else 0
-            await ctx.send(f"**{user_name}**님의 승률: {win_rate:.2f}% (승리: {wins}, 패배: {losses})", ephemeral=True)
+            rank = leaderboard.rank(ctx.guild.id, sort_key, user_id)
+            await ctx.send(
+                f"**{user_name}**님의 승률: {record.win_rate * 100:.2f}% (승리: {record.wins}, 패배: {record.losses}) "
+                f"· 레이팅 {record.rating:.0f} · {정렬} {rank}위 / {leaderboard.size(ctx.guild.id, sort_key)}명",
+                ephemeral=True
+            )
         elif team:
-            # 특정 팀의 승률 요약
-            participants = await self.bot.database.get_participants_by_team(team)
-            if not participants:
+            # 현재 확정된 일정의 특정 팀 승률 요약
+            if team not in ["1", "2"]:
+                await ctx.send("❌ 유효하지 않은 팀 번호입니다. 1 또는 2를 입력하세요.", ephemeral=True)
+                return
+            schedule = await self.bot.database.get_confirmed_schedule(ctx.guild.id)
+            if not schedule:
+                await ctx.send("❌ 현재 확정된 내전 일정이 없습니다.", ephemeral=True)
+                return
+            participants = await self.bot.database.get_participants(schedule[0])
+            members = [
+                leaderboard.get(ctx.guild.id, p[0])
+                or PlayerRecord(str(p[0]), p[1], rating=self.bot.database.ratings.rating(ctx.guild.id, p[0]))
+                for p in participants if p[2] == int(team)
+            ]
+            if not members:
                 await ctx.send(f"❌ {team} 팀의 전적이 없습니다.", ephemeral=True)
                 return
-            summary = []
-            for participant in participants:
-                user_name, wins, losses = participant[1], participant[3], participant[4]
-                win_rate = (wins / (wins + losses)) * 100 if (wins + losses) > 0 else 0
-                summary.append(f"{user_name}: {win_rate:.2f}% (승리: {wins}, 패배: {losses})")
-            await ctx.send("\n".join(summary), ephemeral=True)
+            members.sort(key=lambda record: record.sort_key(sort_key))
+            embed = discord.Embed(
+                title=f"{self.team_a_name if team == '1' else self.team_b_name} 승률",
+                description="\n".join(format_record(rank, record) for rank, record in enumerate(members, start=1)),
+                color=discord.Color.blue()
+            )
+            await ctx.send(embed=embed, ephemeral=True)
         else:
-            # 모든 참가자의 승률 출력
-            participants = await self.bot.database.get_all_participants_stats()
-            if not participants:
+            # 전체 순위를 페이지로 나눠서 출력
+            if not leaderboard.size(ctx.guild.id, sort_key):
                 await ctx.send("❌ 참가자 전적이 없습니다.", ephemeral=True)
                 return
-            summary = []
-            for participant in participants:
-                user_name, wins, losses = participant[1], participant[3], participant[4]
-                win_rate = (wins / (wins + losses)) * 100 if (wins + losses) > 0 else 0
-                summary.append(f"{user_name}: {win_rate:.2f}% (승리: {wins}, 패배: {losses})")
-            await ctx.send("\n".join(summary), ephemeral=True)    
-    
-        
+            view = LeaderboardView(leaderboard, ctx.guild.id, sort_key, f"🏆 {정렬} 순위")
+            await ctx.send(embed=view.create_embed(), view=view, ephemeral=True)
+
+
 async def setup(bot) -> None:
     await bot.add_cog(ParticipantManagement(bot))
\ No newline at end of file
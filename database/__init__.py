@@ -6,12 +6,224 @@ Description:
 Version: 6.2.0
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+import hashlib
+import itertools
+from pathlib import Path
+import time
+
 import aiosqlite
 
+from database import queries
+from database.ballots import BallotLedger
+from database.cache import CONFIRMED_SCHEDULE, VOTING_SCHEDULES, ScheduleCache
+from database.leaderboard import Leaderboard
+from database.ratings import RatingBook
+from database.tally import VoteTally
+from utils.metrics import instrumented
+
+# register_participant_if_open 결과 코드
+REGISTERED = "registered"
+ALREADY_REGISTERED = "already_registered"
+PARTICIPANTS_FULL = "full"
 
+
+# 공개 비동기 메서드마다 "db" 지연 시간, 오류 수, 실행 중인 개수를 기록
+@instrumented("db")
 class DatabaseManager:
-    def __init__(self, *, connection: aiosqlite.Connection) -> None:
+    def __init__(
+        self,
+        *,
+        connection: aiosqlite.Connection,
+        readers: list = None,
+        group_commit: bool = False,
+        commit_window: float = 0.005,
+        commit_max_batch: int = 32,
+    ) -> None:
+        """
+        :param connection: The aiosqlite connection every write goes through.
+        :param readers: Optional read-only connections; when given, read methods are served from this pool.
+        :param group_commit: When enabled, writes issued within `commit_window` seconds
+            (or until `commit_max_batch` writes are pending) share a single commit.
+        """
         self.connection = connection
+        self.readers = readers or []
+        self._read_pool = None
+        if self.readers:
+            self._read_pool = asyncio.Queue()
+            for reader in self.readers:
+                self._read_pool.put_nowait(reader)
+        self.schedule_cache = ScheduleCache()
+        self.vote_tally = VoteTally(self)
+        self.ratings = RatingBook(self)
+        self.leaderboard = Leaderboard(self)
+        self.mvp_ballots = BallotLedger(self)
+        self.group_commit = group_commit
+        self.commit_window = commit_window
+        self.commit_max_batch = commit_max_batch
+        self.commit_stats = {
+            "commits": 0,
+            "writes": 0,
+            "max_batch_size": 0,
+            "last_commit_ms": 0.0,
+            "total_commit_ms": 0.0,
+        }
+        self._pending_commits = []
+        self._commit_timer = None
+        self._flush_tasks = set()
+        # 커밋과 여러 문장으로 된 쓰기 작업을 서로 배제 (모든 쓰기가 한 연결의 트랜잭션을 공유하므로)
+        self._commit_lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, path, *, read_pool_size: int = 2, synchronous: str = "FULL", **kwargs) -> "DatabaseManager":
+        """
+        WAL 모드로 쓰기 전용 연결 1개와 읽기 전용 연결 풀을 열어 DatabaseManager를 생성합니다.
+
+        :param path: The path of the SQLite database file.
+        :param read_pool_size: The number of read-only connections, 0 to serve reads from the writer.
+        :param synchronous: "FULL" syncs the WAL on every commit. "NORMAL" is faster, but the last
+            committed transactions can roll back on power loss (not on a process crash).
+        """
+        synchronous = synchronous.upper()
+        if synchronous not in ("FULL", "NORMAL"):
+            raise ValueError(f"synchronous must be FULL or NORMAL, got {synchronous!r}")
+        connection = await aiosqlite.connect(path)
+        await connection.execute("PRAGMA journal_mode=WAL")
+        await connection.execute(f"PRAGMA synchronous={synchronous}")
+        await connection.execute("PRAGMA busy_timeout=5000")
+
+        readers = []
+        read_uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+        for _ in range(read_pool_size):
+            reader = await aiosqlite.connect(read_uri, uri=True)
+            await reader.execute("PRAGMA query_only=1")
+            await reader.execute("PRAGMA busy_timeout=5000")
+            readers.append(reader)
+        return cls(connection=connection, readers=readers, **kwargs)
+
+    @asynccontextmanager
+    async def _reader(self):
+        """ 읽기 전용 연결 하나를 빌려옴 (풀이 없으면 쓰기 연결 사용) """
+        if self._read_pool is None:
+            yield self.connection
+            return
+        connection = await self._read_pool.get()
+        try:
+            yield connection
+        finally:
+            self._read_pool.put_nowait(connection)
+
+    @asynccontextmanager
+    async def _write(self):
+        """
+        여러 문장으로 된 쓰기 작업용 커서.
+
+        모든 쓰기가 한 연결의 트랜잭션을 공유하므로, 문장 사이에 다른 작업의 커밋이 끼어들면
+        이 작업의 일부만 커밋됩니다. 블록이 끝날 때까지 커밋 잠금을 잡아서 이를 막고,
+        중간에 실패하면 세이브포인트까지 되돌려서 앞 문장이 다음 커밋에 섞이지 않도록 합니다.
+        (ROLLBACK은 그룹 커밋을 기다리는 다른 작업의 쓰기까지 버리므로 쓰지 않음)
+        커밋은 블록을 나온 뒤 _commit()으로 합니다. (블록 안에서 호출하면 잠금을 기다리며 멈춤)
+        """
+        async with self._commit_lock, self.connection.cursor() as cursor:
+            if not self.connection.in_transaction:
+                # 바깥 트랜잭션 없이 RELEASE하면 바로 커밋되므로 먼저 시작
+                await cursor.execute("BEGIN")
+            await cursor.execute("SAVEPOINT w")
+            try:
+                yield cursor
+            except BaseException:
+                await cursor.execute("ROLLBACK TO w")
+                await cursor.execute("RELEASE w")
+                raise
+            await cursor.execute("RELEASE w")
+
+    async def _commit(self) -> None:
+        """
+        쓰기 작업 커밋.
+
+        group commit 모드에서는 대기열에 올라간 뒤 공유 커밋이 끝날 때까지 기다립니다.
+        호출자의 await가 풀리는 시점에는 항상 커밋이 끝난 상태이고,
+        synchronous=FULL(기본값)이면 전원이 나가도 남아 있도록 디스크에 동기화된 상태입니다.
+        """
+        if not self.group_commit:
+            async with self._commit_lock:
+                started = time.perf_counter()
+                await self.connection.commit()
+                self._record_commit(1, started)
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_commits.append(future)
+        if len(self._pending_commits) >= self.commit_max_batch:
+            self._schedule_flush()
+        elif self._commit_timer is None:
+            self._commit_timer = loop.call_later(self.commit_window, self._schedule_flush)
+        await future
+
+    def _schedule_flush(self) -> None:
+        if self._commit_timer is not None:
+            self._commit_timer.cancel()
+            self._commit_timer = None
+        batch, self._pending_commits = self._pending_commits, []
+        # 가득 찬 배치마다 작업이 생기므로 모두 보관해서 flush()가 전부 기다리도록 함
+        task = asyncio.ensure_future(self._commit_batch(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self) -> None:
+        """ 대기 중인 쓰기 작업을 한 번의 커밋으로 반영 """
+        if self._commit_timer is not None:
+            self._commit_timer.cancel()
+            self._commit_timer = None
+        batch, self._pending_commits = self._pending_commits, []
+        await self._commit_batch(batch)
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks)
+
+    async def _commit_batch(self, batch) -> None:
+        if not batch:
+            return
+        async with self._commit_lock:
+            started = time.perf_counter()
+            try:
+                await self.connection.commit()
+            except Exception as e:
+                for future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self._record_commit(len(batch), started)
+            for future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _record_commit(self, batch_size: int, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.commit_stats
+        stats["commits"] += 1
+        stats["writes"] += batch_size
+        stats["max_batch_size"] = max(stats["max_batch_size"], batch_size)
+        stats["last_commit_ms"] = elapsed_ms
+        stats["total_commit_ms"] += elapsed_ms
+
+    def get_commit_stats(self) -> dict:
+        """ 커밋 배치 크기 및 지연 시간 통계 """
+        stats = dict(self.commit_stats)
+        commits = stats["commits"] or 1
+        stats["avg_batch_size"] = stats["writes"] / commits
+        stats["avg_commit_ms"] = stats["total_commit_ms"] / commits
+        stats["pending"] = len(self._pending_commits)
+        return stats
+
+    async def close(self) -> None:
+        """ 대기 중인 쓰기를 반영한 뒤 연결 종료 """
+        await self.vote_tally.flush()
+        await self.flush()
+        await self.connection.close()
+        for reader in self.readers:
+            await reader.close()
 
     async def add_warn(
         self, user_id: int, server_id: int, moderator_id: int, reason: str
@@ -42,7 +254,7 @@ class DatabaseManager:
                     reason,
                 ),
             )
-            await self.connection.commit()
+            await self._commit()
             return warn_id
 
     async def remove_warn(self, warn_id: int, user_id: int, server_id: int) -> int:
@@ -61,7 +273,7 @@ class DatabaseManager:
                 server_id,
             ),
         )
-        await self.connection.commit()
+        await self._commit()
         rows = await self.connection.execute(
             "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?",
             (
@@ -81,50 +293,103 @@ class DatabaseManager:
         :param server_id: The ID of the server that should be checked.
         :return: A list of all the warnings of the user.
         """
-        rows = await self.connection.execute(
-            "SELECT user_id, server_id, moderator_id, reason, strftime('%s', created_at), id FROM warns WHERE user_id=? AND server_id=?",
-            (
-                user_id,
-                server_id,
-            ),
-        )
-        async with rows as cursor:
-            result = await cursor.fetchall()
-            result_list = []
-            for row in result:
-                result_list.append(row)
-            return result_list
-
-    async def insert_schedule(self, date, time='20:00', status='voting'):
+        async with self._reader() as connection:
+            rows = await connection.execute(
+                "SELECT user_id, server_id, moderator_id, reason, strftime('%s', created_at), id FROM warns WHERE user_id=? AND server_id=?",
+                (
+                    user_id,
+                    server_id,
+                ),
+            )
+            async with rows as cursor:
+                result = await cursor.fetchall()
+                result_list = []
+                for row in result:
+                    result_list.append(row)
+                return result_list
+
+    async def insert_schedule(self, guild_id, date, time='20:00', status='voting'):
+        guild_id = str(guild_id)
+        if status != 'voting':
+            self.schedule_cache.invalidate((CONFIRMED_SCHEDULE, guild_id))
         async with self.connection.cursor() as cursor:
             await cursor.execute(
-                'INSERT INTO schedules (date, time, status) VALUES (?, ?, ?)',
-                (date, time, status)
+                'INSERT INTO schedules (guild_id, date, time, status) VALUES (?, ?, ?, ?)',
+                (guild_id, date, time, status)
             )
-            await self.connection.commit()
+            schedule_id = cursor.lastrowid
+            await self._commit()
 
-    async def get_voting_schedules(self):
-        async with self.connection.cursor() as cursor:
-            await cursor.execute('''
-                SELECT s.id, s.date, COUNT(sv.id) as vote_count
-                FROM schedules s
-                LEFT JOIN schedule_votes sv ON s.id = sv.schedule_id
-                WHERE s.status = 'voting'
-                GROUP BY s.id
-                ORDER BY vote_count DESC, s.date ASC
-            ''')
+        # 투표 중인 일정 캐시는 새 일정을 바로 반영 (write-through)
+        if status == 'voting':
+            self.schedule_cache.update(
+                (VOTING_SCHEDULES, guild_id), lambda schedules: {**schedules, date: schedule_id}
+            )
+            self.vote_tally.add_schedule(guild_id, schedule_id, date)
+        else:
+            self.schedule_cache.invalidate((CONFIRMED_SCHEDULE, guild_id))
+        return schedule_id
+
+    async def get_voting_schedules(self, guild_id):
+        await self.vote_tally.flush()
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_VOTING_SCHEDULES, (str(guild_id),))
             return await cursor.fetchall()
 
-    async def update_schedule_status(self, schedule_id, status):
+    async def get_vote_status(self, guild_id):
+        """
+        길드에서 투표 중인 일정별 투표 현황을 한 번의 쿼리로 조회합니다.
+
+        :return: A list of (schedule_id, date, vote_count, voter_names) tuples ordered by
+            vote count (descending) then date, with voter names in voting order.
+        """
+        await self.vote_tally.flush()
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_VOTE_STATUS, (str(guild_id),))
+            rows = await cursor.fetchall()
+
+        status = []
+        for (schedule_id, date, vote_count), voters in itertools.groupby(rows, key=lambda row: row[:3]):
+            status.append((schedule_id, date, vote_count, [row[3] for row in voters if row[3] is not None]))
+        return status
+
+    async def update_schedule_status(self, guild_id, schedule_id, status):
+        guild_id = str(guild_id)
+        cache_keys = ((CONFIRMED_SCHEDULE, guild_id), (VOTING_SCHEDULES, guild_id))
+        # 쓰기 전후로 무효화해서 커밋 도중 시작된 조회가 이전 상태를 캐시에 남기지 않도록 함
+        self.schedule_cache.invalidate(*cache_keys)
         async with self.connection.cursor() as cursor:
             await cursor.execute(
-                'UPDATE schedules SET status = ? WHERE id = ?',
-                (status, schedule_id)
+                'UPDATE schedules SET status = ? WHERE id = ? AND guild_id = ?',
+                (status, schedule_id, guild_id)
+            )
+            await self._commit()
+        self.schedule_cache.invalidate(*cache_keys)
+        if status == 'voting':
+            self.vote_tally.invalidate(guild_id)
+        else:
+            self.vote_tally.remove_schedule(guild_id, schedule_id)
+
+    async def get_voting_schedule_ids(self, guild_id):
+        """ 길드에서 투표 중인 일정의 {date: schedule_id} 매핑 조회 (캐시) """
+        cache_key = (VOTING_SCHEDULES, str(guild_id))
+        hit, schedules = self.schedule_cache.get(cache_key)
+        if hit:
+            return schedules
+
+        generation = self.schedule_cache.generation
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT id, date FROM schedules WHERE guild_id = ? AND status = 'voting'",
+                (str(guild_id),)
             )
-            await self.connection.commit()
+            schedules = {date: schedule_id for schedule_id, date in await cursor.fetchall()}
+        self.schedule_cache.store(cache_key, schedules, generation)
+        return schedules
 
     async def get_voters(self, schedule_id):
-        async with self.connection.cursor() as cursor:
+        await self.vote_tally.flush()
+        async with self._reader() as connection, connection.cursor() as cursor:
             await cursor.execute('''
                 SELECT user_name FROM schedule_votes
                 WHERE schedule_id = ?
@@ -137,7 +402,7 @@ class DatabaseManager:
                 'INSERT INTO schedule_votes (schedule_id, user_id, user_name) VALUES (?, ?, ?)',
                 (schedule_id, user_id, user_name)
             )
-            await self.connection.commit()
+            await self._commit()
 
     async def delete_vote(self, schedule_id, user_id):
         async with self.connection.cursor() as cursor:
@@ -145,10 +410,42 @@ class DatabaseManager:
                 'DELETE FROM schedule_votes WHERE schedule_id = ? AND user_id = ?',
                 (schedule_id, user_id)
             )
-            await self.connection.commit()
+            await self._commit()
+
+    async def get_open_votes(self, guild_id):
+        """ 길드에서 투표 중인 모든 일정의 투표 내역 조회 (schedule_id, user_id, user_name) """
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute('''
+                SELECT sv.schedule_id, sv.user_id, sv.user_name
+                FROM schedules s
+                JOIN schedule_votes sv ON s.id = sv.schedule_id
+                WHERE s.guild_id = ? AND s.status = 'voting'
+            ''', (str(guild_id),))
+            return await cursor.fetchall()
+
+    async def apply_vote_changes(self, changes):
+        """
+        투표 추가/취소를 순서대로 반영하고 한 번만 커밋합니다.
+
+        :param changes: (voted, schedule_id, user_id, user_name) 튜플 목록
+        """
+        async with self._write() as cursor:
+            for voted, schedule_id, user_id, user_name in changes:
+                if voted:
+                    await cursor.execute(
+                        'INSERT OR IGNORE INTO schedule_votes (schedule_id, user_id, user_name) VALUES (?, ?, ?)',
+                        (schedule_id, user_id, user_name)
+                    )
+                else:
+                    await cursor.execute(
+                        'DELETE FROM schedule_votes WHERE schedule_id = ? AND user_id = ?',
+                        (schedule_id, user_id)
+                    )
+        await self._commit()
 
     async def get_vote_count(self, schedule_id, user_id=None):
-        async with self.connection.cursor() as cursor:
+        await self.vote_tally.flush()
+        async with self._reader() as connection, connection.cursor() as cursor:
             if user_id:
                 # 특정 사용자의 투표 수 조회
                 await cursor.execute('''
@@ -161,17 +458,19 @@ class DatabaseManager:
                 ''', (schedule_id,))
             return await cursor.fetchone()
         
-    async def get_confirmed_schedule(self):
-        """ 가장 최근에 확정된 일정 조회 """
-        async with self.connection.cursor() as cursor:
-            await cursor.execute('''
-                SELECT id, date 
-                FROM schedules 
-                WHERE status = 'confirmed' 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ''')
-            return await cursor.fetchone()
+    async def get_confirmed_schedule(self, guild_id):
+        """ 길드에서 가장 최근에 확정된 일정 조회 (캐시) """
+        cache_key = (CONFIRMED_SCHEDULE, str(guild_id))
+        hit, schedule = self.schedule_cache.get(cache_key)
+        if hit:
+            return schedule
+
+        generation = self.schedule_cache.generation
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_CONFIRMED_SCHEDULE, (str(guild_id),))
+            schedule = await cursor.fetchone()
+        self.schedule_cache.store(cache_key, schedule, generation)
+        return schedule
 
     async def register_participant(self, schedule_id, user_id, user_name):
         """ 참가자 등록 """
@@ -180,20 +479,52 @@ class DatabaseManager:
                 'INSERT INTO participants (schedule_id, user_id, user_name) VALUES (?, ?, ?)', 
                 (schedule_id, user_id, user_name)
             )
-            await self.connection.commit()
+            await self._commit()
+
+    async def register_participant_if_open(self, schedule_id, user_id, user_name, capacity=10):
+        """
+        자리가 남아 있고 아직 등록되지 않은 경우에만 참가자 등록.
+
+        인원 확인과 등록이 하나의 INSERT 문으로 처리되므로 동시에 신청해도 정원을 넘지 않습니다.
+
+        :return: A (code, count) tuple. code is REGISTERED with count being the seat number,
+            or ALREADY_REGISTERED / PARTICIPANTS_FULL with count being the current participant count.
+        """
+        async with self.connection.cursor() as cursor:
+            await cursor.execute('''
+                INSERT INTO participants (schedule_id, user_id, user_name)
+                SELECT :schedule_id, :user_id, :user_name
+                WHERE (SELECT COUNT(*) FROM participants WHERE schedule_id = :schedule_id) < :capacity
+                ON CONFLICT(schedule_id, user_id) DO NOTHING
+                RETURNING (SELECT COUNT(*) FROM participants WHERE schedule_id = :schedule_id)
+            ''', {"schedule_id": schedule_id, "user_id": user_id, "user_name": user_name, "capacity": capacity})
+            seat = await cursor.fetchone()
+            if seat is not None:
+                await self._commit()
+                return REGISTERED, seat[0]
+
+            # 등록되지 않은 경우에만 이유 확인
+            await cursor.execute('''
+                SELECT EXISTS(SELECT 1 FROM participants WHERE schedule_id = :schedule_id AND user_id = :user_id),
+                       (SELECT COUNT(*) FROM participants WHERE schedule_id = :schedule_id)
+            ''', {"schedule_id": schedule_id, "user_id": user_id})
+            registered, count = await cursor.fetchone()
+            return (ALREADY_REGISTERED if registered else PARTICIPANTS_FULL), count
 
     async def unregister_participant(self, schedule_id, user_id):
-        """ 참가자 취소 """
+        """ 참가자 취소 (취소된 신청이 있었는지 반환) """
         async with self.connection.cursor() as cursor:
             await cursor.execute(
                 'DELETE FROM participants WHERE schedule_id = ? AND user_id = ?', 
                 (schedule_id, user_id)
             )
-            await self.connection.commit()
+            deleted = cursor.rowcount > 0
+            await self._commit()
+            return deleted
 
     async def check_participant(self, schedule_id, user_id):
         """ 참가자 존재 여부 확인 """
-        async with self.connection.cursor() as cursor:
+        async with self._reader() as connection, connection.cursor() as cursor:
             await cursor.execute(
                 'SELECT id FROM participants WHERE schedule_id = ? AND user_id = ?', 
                 (schedule_id, user_id)
@@ -202,7 +533,7 @@ class DatabaseManager:
 
     async def get_participant_count(self, schedule_id):
         """ 참가자 수 조회 """
-        async with self.connection.cursor() as cursor:
+        async with self._reader() as connection, connection.cursor() as cursor:
             await cursor.execute(
                 'SELECT COUNT(*) FROM participants WHERE schedule_id = ?', 
                 (schedule_id,)
@@ -211,7 +542,7 @@ class DatabaseManager:
 
     async def get_participants(self, schedule_id):
         """ 참가자 목록 조회 (user_id, user_name, team) """
-        async with self.connection.cursor() as cursor:
+        async with self._reader() as connection, connection.cursor() as cursor:
             await cursor.execute(
                 'SELECT user_id, user_name, team FROM participants WHERE schedule_id = ?', 
                 (schedule_id,)
@@ -220,7 +551,7 @@ class DatabaseManager:
 
     async def assign_teams(self, schedule_id, team_a, team_b):
         """ 팀 배정 """
-        async with self.connection.cursor() as cursor:
+        async with self._write() as cursor:
             # 팀 A 배정
             for user in team_a:
                 await cursor.execute(
@@ -234,75 +565,273 @@ class DatabaseManager:
                     'UPDATE participants SET team = 2 WHERE schedule_id = ? AND user_id = ?', 
                     (schedule_id, user[0])
                 )
-            
-            await self.connection.commit()
+        
+        await self._commit()
 
-    async def record_match_result(self, schedule_id, winning_team):
+    async def record_match_result(self, guild_id, schedule_id, winning_team):
         """ 경기 결과 기록 """
-        async with self.connection.cursor() as cursor:
+        guild_id = str(guild_id)
+        await self.ratings.load(guild_id)
+        async with self._write() as cursor:
             # 경기 결과 테이블에 기록
             await cursor.execute(
                 'INSERT INTO match_results (schedule_id, winning_team) VALUES (?, ?)', 
                 (schedule_id, winning_team)
             )
+            match_id = cursor.lastrowid
             
-            # 참가자들의 개인 전적 업데이트 (SQLite 호환 방식으로 수정)
+            # 팀이 배정된 참가자들의 결과를 원장에 한 번에 기록
             await cursor.execute('''
-            UPDATE player_stats 
-            SET wins = wins + CASE WHEN (
-                    SELECT team FROM participants 
-                    WHERE participants.user_id = player_stats.user_id 
-                    AND participants.schedule_id = ?
-                ) = ? THEN 1 ELSE 0 END,
-                losses = losses + CASE WHEN (
-                    SELECT team FROM participants 
-                    WHERE participants.user_id = player_stats.user_id 
-                    AND participants.schedule_id = ?
-                ) != ? THEN 1 ELSE 0 END
-            WHERE EXISTS (
-                SELECT 1 FROM participants 
-                WHERE participants.user_id = player_stats.user_id 
-                AND participants.schedule_id = ?
-            )
-            ''', (schedule_id, winning_team, schedule_id, winning_team, schedule_id))
+                INSERT INTO match_player_results (match_id, schedule_id, user_id, team, won, guild_id)
+                SELECT ?, schedule_id, user_id, team, team = ?, ?
+                FROM participants
+                WHERE schedule_id = ? AND team IS NOT NULL
+                RETURNING user_id, team, won
+            ''', (match_id, winning_team, guild_id, schedule_id))
+            outcomes = await cursor.fetchall()
+            
+            # 이번 경기 참가자들의 개인 전적만 원장과 조인해서 업데이트
+            await cursor.execute('''
+                UPDATE player_stats
+                SET wins = wins + l.won,
+                    losses = losses + 1 - l.won
+                FROM match_player_results l
+                WHERE l.match_id = ? AND player_stats.guild_id = l.guild_id AND player_stats.user_id = l.user_id
+            ''', (match_id,))
             
-            await self.connection.commit()
+            # 레이팅은 이번 경기 참가자만 증분 업데이트
+            await self._upsert_player_ratings(cursor, self.ratings.apply_match(guild_id, outcomes))
+        
+        await self._commit()
+        self.leaderboard.apply_match(guild_id, outcomes)
+        self.mvp_ballots.invalidate(schedule_id)
+        return match_id
+
+    async def get_match_result(self, schedule_id):
+        """ 일정의 경기 결과 조회 (winning_team, match_id) """
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(
+                'SELECT winning_team, id FROM match_results WHERE schedule_id = ? ORDER BY id DESC LIMIT 1',
+                (schedule_id,)
+            )
+            return await cursor.fetchone()
 
-    async def get_player_stats(self, user_id=None):
-        """ 개인 또는 전체 플레이어 전적 조회 """
-        async with self.connection.cursor() as cursor:
+    async def void_match_result(self, guild_id, schedule_id):
+        """ 잘못 기록된 경기 결과 취소 (원장 기준으로 해당 참가자 전적만 되돌림) """
+        async with self._write() as cursor:
+            await cursor.execute('''
+                UPDATE player_stats
+                SET wins = wins - l.won,
+                    losses = losses - (1 - l.won)
+                FROM match_player_results l
+                WHERE l.schedule_id = ? AND player_stats.guild_id = l.guild_id AND player_stats.user_id = l.user_id
+            ''', (schedule_id,))
+            await cursor.execute('DELETE FROM match_player_results WHERE schedule_id = ?', (schedule_id,))
+            await cursor.execute('DELETE FROM match_results WHERE schedule_id = ?', (schedule_id,))
+        await self._commit()
+        # 레이팅은 경기 순서에 의존하므로 되돌리지 않고 원장 전체로 다시 계산
+        await self.ratings.rebuild(guild_id)
+        self.leaderboard.invalidate(guild_id)
+        self.mvp_ballots.invalidate(schedule_id)
+
+    async def recompute_player_stats(self, guild_id):
+        """ 길드의 원장으로부터 해당 길드 플레이어 전적 재계산 (정정용, guild_id가 없는 기존 행은 건드리지 않음) """
+        guild_id = str(guild_id)
+        async with self._write() as cursor:
+            await cursor.execute('UPDATE player_stats SET wins = 0, losses = 0 WHERE guild_id = ?', (guild_id,))
+            await cursor.execute('''
+                UPDATE player_stats
+                SET wins = t.wins,
+                    losses = t.games - t.wins
+                FROM (
+                    SELECT user_id, SUM(won) AS wins, COUNT(*) AS games
+                    FROM match_player_results
+                    WHERE guild_id = ?
+                    GROUP BY user_id
+                ) AS t
+                WHERE player_stats.guild_id = ? AND player_stats.user_id = t.user_id
+            ''', (guild_id, guild_id))
+        await self._commit()
+        self.leaderboard.invalidate(guild_id)
+
+    async def get_match_history(self, guild_id):
+        """ 레이팅 재계산용 길드 경기 원장 (match_id, user_id, team, won) """
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_MATCH_HISTORY, (str(guild_id),))
+            return await cursor.fetchall()
+
+    async def get_player_ratings(self, guild_id):
+        """ 길드 플레이어 레이팅 조회 (user_id, rating, rd, games) """
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(
+                'SELECT user_id, rating, rd, games FROM player_ratings WHERE guild_id = ?',
+                (str(guild_id),)
+            )
+            return await cursor.fetchall()
+
+    async def replace_player_ratings(self, guild_id, ratings):
+        """ 길드 플레이어 레이팅 전체 교체 (guild_id, user_id, rating, rd, games) """
+        async with self._write() as cursor:
+            await cursor.execute('DELETE FROM player_ratings WHERE guild_id = ?', (str(guild_id),))
+            await self._upsert_player_ratings(cursor, ratings)
+        await self._commit()
+
+    async def _upsert_player_ratings(self, cursor, ratings):
+        await cursor.executemany('''
+            INSERT INTO player_ratings (guild_id, user_id, rating, rd, games, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                rating = excluded.rating,
+                rd = excluded.rd,
+                games = excluded.games,
+                updated_at = excluded.updated_at
+        ''', ratings)
+
+    async def get_player_stats(self, guild_id, user_id=None):
+        """ 길드의 개인 또는 전체 플레이어 전적 조회 """
+        async with self._reader() as connection, connection.cursor() as cursor:
             if user_id:
                 await cursor.execute(
-                    'SELECT * FROM player_stats WHERE user_id = ?', 
-                    (user_id,)
+                    'SELECT * FROM player_stats WHERE guild_id = ? AND user_id = ?', 
+                    (str(guild_id), user_id)
                 )
             else:
-                await cursor.execute('SELECT * FROM player_stats')
+                await cursor.execute('SELECT * FROM player_stats WHERE guild_id = ?', (str(guild_id),))
             
             return await cursor.fetchall()
 
-    async def get_user_id_by_name(self, user_name: str):
-        async with self.connection.execute(
-            "SELECT user_id FROM player_stats WHERE user_name = ?",
-            (user_name,)
+    async def get_user_id_by_name(self, guild_id, user_name: str):
+        async with self._reader() as connection, connection.execute(
+            queries.SELECT_USER_ID_BY_NAME, (str(guild_id), user_name)
         ) as cursor:
             result = await cursor.fetchone()
             return result[0] if result else None
 
-    async def get_user_id(self, user_id: str):
-        async with self.connection.execute(
-            "SELECT user_id FROM player_stats WHERE user_id = ?",
-            (user_id,)
+    async def get_user_id(self, guild_id, user_id: str):
+        async with self._reader() as connection, connection.execute(
+            "SELECT user_id FROM player_stats WHERE guild_id = ? AND user_id = ?",
+            (str(guild_id), user_id)
         ) as cursor:
             return await cursor.fetchone()
 
-    async def add_user(self, user_id: str, user_name: str):
+    async def add_user(self, guild_id, user_id: str, user_name: str):
         async with self.connection.execute(
-            "INSERT INTO player_stats (user_id, user_name) VALUES (?, ?)",
+            "INSERT INTO player_stats (guild_id, user_id, user_name) VALUES (?, ?, ?)",
+            (str(guild_id), user_id, user_name)
+        ) as cursor:
+            await self._commit()
+
+    async def get_user_names(self, guild_id):
+        """ 길드에 등록된 전체 유저의 {user_id: user_name} 매핑 조회 """
+        async with self._reader() as connection, connection.execute(
+            "SELECT user_id, user_name FROM player_stats WHERE guild_id = ?",
+            (str(guild_id),)
+        ) as cursor:
+            return {str(user_id): user_name for user_id, user_name in await cursor.fetchall()}
+
+    async def upsert_users(self, guild_id, users, sync_key=None, sync_value=None):
+        """
+        유저 일괄 추가 및 닉네임 갱신.
+
+        모든 행을 하나의 executemany 문으로 처리하고, 워터마크(sync_key/sync_value)가
+        주어지면 같은 트랜잭션 안에서 함께 기록한 뒤 한 번만 커밋합니다.
+
+        :param users: (user_id, user_name) 튜플 목록
+        """
+        guild_id = str(guild_id)
+        async with self._write() as cursor:
+            if users:
+                await cursor.executemany('''
+                    INSERT INTO player_stats (guild_id, user_id, user_name) VALUES (?, ?, ?)
+                    ON CONFLICT(guild_id, user_id) DO UPDATE SET user_name = excluded.user_name
+                ''', [(guild_id, user_id, user_name) for user_id, user_name in users])
+            if sync_key is not None:
+                await self._set_sync_state(cursor, sync_key, sync_value)
+        await self._commit()
+        if users:
+            self.leaderboard.invalidate(guild_id)
+
+    async def sync_members(self, guild_id, members, sync_key):
+        """
+        길드 멤버를 player_stats에 동기화.
+
+        멤버 목록의 지문을 지난 동기화 때 저장한 워터마크와 비교해서 같으면 아무것도 하지 않고,
+        다르면 신규 유저 및 닉네임이 바뀐 유저만 추려서 워터마크와 함께 한 트랜잭션으로 반영합니다.
+
+        :param members: A {user_id: user_name} mapping of the current members.
+        :return: The number of users written, or None when the member set is unchanged.
+        """
+        watermark = hashlib.sha256(
+            "\n".join(f"{user_id}:{user_name}" for user_id, user_name in sorted(members.items())).encode("utf-8")
+        ).hexdigest()
+        if watermark == await self.get_sync_state(sync_key):
+            return None
+
+        known_users = await self.get_user_names(guild_id)
+        changed = [
             (user_id, user_name)
+            for user_id, user_name in members.items()
+            if known_users.get(user_id) != user_name
+        ]
+        await self.upsert_users(guild_id, changed, sync_key, watermark)
+        return len(changed)
+
+    async def get_sync_state(self, key):
+        """ 동기화 워터마크 조회 """
+        async with self._reader() as connection, connection.execute(
+            "SELECT value FROM sync_state WHERE key = ?",
+            (key,)
         ) as cursor:
-            await self.connection.commit()
-            
+            result = await cursor.fetchone()
+            return result[0] if result else None
+
+    async def set_sync_state(self, key, value):
+        """ 동기화 워터마크 기록 """
+        async with self.connection.cursor() as cursor:
+            await self._set_sync_state(cursor, key, value)
+            await self._commit()
+
+    async def _set_sync_state(self, cursor, key, value):
+        await cursor.execute('''
+            INSERT INTO sync_state (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+        ''', (key, value))
+
+    async def count_legacy_rows(self):
+        """ 길드 분리 이전에 기록된(guild_id가 NULL인) 일정 및 전적 행 수 조회 """
+        async with self._reader() as connection, connection.execute('''
+            SELECT (SELECT COUNT(*) FROM schedules WHERE guild_id IS NULL)
+                 + (SELECT COUNT(*) FROM player_stats WHERE guild_id IS NULL)
+        ''') as cursor:
+            result = await cursor.fetchone()
+            return result[0]
+
+    async def adopt_legacy_rows(self, guild_id):
+        """
+        길드 분리 이전에 기록된(guild_id가 NULL인) 행을 한 길드로 편입합니다.
+
+        봇이 하나의 길드에서만 쓰이던 시절의 데이터이므로 봇이 정확히 하나의 길드에 있을 때만 호출합니다.
+        이미 같은 길드에 같은 유저의 전적이 있으면 해당 레거시 전적 행은 건너뜁니다.
+
+        :return: The number of adopted rows.
+        """
+        guild_id = str(guild_id)
+        adopted = 0
+        async with self._write() as cursor:
+            for table in ("schedules", "match_player_results", "mvp_awards"):
+                await cursor.execute(f'UPDATE {table} SET guild_id = ? WHERE guild_id IS NULL', (guild_id,))
+                adopted += cursor.rowcount
+            await cursor.execute('UPDATE OR IGNORE player_stats SET guild_id = ? WHERE guild_id IS NULL', (guild_id,))
+            adopted += cursor.rowcount
+        await self._commit()
+
+        if adopted:
+            self.schedule_cache.invalidate()
+            self.vote_tally.invalidate(guild_id)
+            await self.ratings.rebuild(guild_id)
+            self.leaderboard.invalidate(guild_id)
+        return adopted
+
     async def create_mvp_vote(self, schedule_id, winning_team_votes=3, losing_team_votes=1, can_vote_own_team=True):
         """MVP 투표 설정 생성"""
         async with self.connection.cursor() as cursor:
@@ -310,17 +839,46 @@ class DatabaseManager:
                 'INSERT INTO mvp_vote_settings (schedule_id, winning_team_votes, losing_team_votes, can_vote_own_team) VALUES (?, ?, ?, ?)',
                 (schedule_id, winning_team_votes, losing_team_votes, 1 if can_vote_own_team else 0)
             )
-            await self.connection.commit()
+            await self._commit()
+        self.mvp_ballots.invalidate(schedule_id)
 
     async def get_mvp_vote_settings(self, schedule_id):
         """MVP 투표 설정 조회"""
-        async with self.connection.cursor() as cursor:
+        async with self._reader() as connection, connection.cursor() as cursor:
             await cursor.execute(
                 'SELECT * FROM mvp_vote_settings WHERE schedule_id = ?',
                 (schedule_id,)
             )
             return await cursor.fetchone()
 
+    async def get_mvp_ballot_state(self, schedule_id):
+        """
+        MVP 투표권 장부 구성에 필요한 정보 조회.
+
+        :return: A (settings, participants) tuple. settings is (winning_team_votes, losing_team_votes,
+            can_vote_own_team, winning_team) or None when there is no MVP vote for the schedule,
+            participants is a list of (user_id, team, used_votes).
+        """
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_MVP_BALLOT_SETTINGS, (schedule_id,))
+            settings = await cursor.fetchone()
+            await cursor.execute('''
+                SELECT p.user_id, p.team,
+                       (SELECT COALESCE(SUM(v.vote_count), 0) FROM mvp_votes v
+                        WHERE v.schedule_id = p.schedule_id AND v.voter_id = p.user_id)
+                FROM participants p
+                WHERE p.schedule_id = ? AND p.team IS NOT NULL
+            ''', (schedule_id,))
+            return settings, await cursor.fetchall()
+
+    async def record_mvp_vote_if_allowed(self, schedule_id, voter_id, voted_for_id, max_votes):
+        """ 투표자가 쓴 표가 max_votes 미만일 때만 MVP 투표 기록 (기록되었는지 반환) """
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(queries.INSERT_MVP_VOTE_IF_ALLOWED, {"schedule_id": schedule_id, "voter_id": voter_id, "voted_for_id": voted_for_id, "max_votes": max_votes})
+            recorded = cursor.rowcount > 0
+            await self._commit()
+            return recorded
+
     async def record_mvp_vote(self, schedule_id, voter_id, voted_for_id, vote_count=1):
         """MVP 투표 기록"""
         async with self.connection.cursor() as cursor:
@@ -328,50 +886,41 @@ class DatabaseManager:
                 'INSERT INTO mvp_votes (schedule_id, voter_id, voted_for_id, vote_count) VALUES (?, ?, ?, ?)',
                 (schedule_id, voter_id, voted_for_id, vote_count)
             )
-            await self.connection.commit()
+            await self._commit()
 
     async def get_mvp_votes(self, schedule_id):
         """특정 경기의 MVP 투표 결과 조회"""
-        async with self.connection.cursor() as cursor:
-            await cursor.execute('''
-                SELECT voted_for_id, SUM(vote_count) as total_votes
-                FROM mvp_votes
-                WHERE schedule_id = ?
-                GROUP BY voted_for_id
-                ORDER BY total_votes DESC
-            ''', (schedule_id,))
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_MVP_VOTES, (schedule_id,))
             return await cursor.fetchall()
 
-    async def get_today_mvp(self, date):
+    async def get_today_mvp(self, guild_id, date):
         """오늘의 MVP 조회"""
-        async with self.connection.cursor() as cursor:
+        async with self._reader() as connection, connection.cursor() as cursor:
             await cursor.execute('''
                 SELECT v.voted_for_id, p.user_name, SUM(v.vote_count) as total_votes
                 FROM mvp_votes v
                 JOIN schedules s ON v.schedule_id = s.id
                 JOIN participants p ON v.voted_for_id = p.user_id AND p.schedule_id = v.schedule_id
-                WHERE s.date = ?
+                WHERE s.guild_id = ? AND s.date = ?
                 GROUP BY v.voted_for_id
                 ORDER BY total_votes DESC
                 LIMIT 1
-            ''', (date,))
+            ''', (str(guild_id), date))
             return await cursor.fetchone()
 
-    async def record_mvp_award(self, date, user_id, user_name, total_votes):
+    async def record_mvp_award(self, guild_id, date, user_id, user_name, total_votes):
         """MVP 수상 기록"""
         async with self.connection.cursor() as cursor:
             await cursor.execute(
-                'INSERT INTO mvp_awards (date, user_id, user_name, total_votes) VALUES (?, ?, ?, ?)',
-                (date, user_id, user_name, total_votes)
+                'INSERT INTO mvp_awards (guild_id, date, user_id, user_name, total_votes) VALUES (?, ?, ?, ?, ?)',
+                (str(guild_id), date, user_id, user_name, total_votes)
             )
-            await self.connection.commit()
+            await self._commit()
 
     async def check_user_voted(self, schedule_id, voter_id):
         """사용자가 이미 투표했는지 확인"""
-        async with self.connection.cursor() as cursor:
-            await cursor.execute(
-                'SELECT SUM(vote_count) FROM mvp_votes WHERE schedule_id = ? AND voter_id = ?',
-                (schedule_id, voter_id)
-            )
+        async with self._reader() as connection, connection.cursor() as cursor:
+            await cursor.execute(queries.SELECT_USED_MVP_VOTES, (schedule_id, voter_id))
             result = await cursor.fetchone()
             return result[0] if result[0] is not None else 0
\ No newline at end of file
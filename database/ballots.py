@@ -0,0 +1,97 @@
+"""
+MVP 투표권 장부.
+
+일정별로 투표자의 남은 투표권을 메모리에 두고, 클릭마다 먼저 차감한 뒤 DB에 기록합니다. (장부 구성은 락으로, 확인과 차감은 await 없이 처리)
+DB 기록도 "지금까지 쓴 표 < 투표권"일 때만 삽입되는 조건부 INSERT라서, 장부가 어긋나더라도 초과 투표는 기록되지 않습니다.
+장부는 일정별 첫 클릭 때 mvp_vote_settings/participants/mvp_votes에서 구성됩니다.
+"""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+# cast() 결과 코드
+VOTED = "voted"
+NOT_ELIGIBLE = "not_eligible"
+OWN_TEAM = "own_team"
+NO_VOTES_LEFT = "no_votes_left"
+
+
+@dataclass
+class Ballot:
+    winning_team_votes: int
+    losing_team_votes: int
+    can_vote_own_team: bool
+    winning_team: int
+    teams: dict = field(default_factory=dict)  # user_id -> team
+    used: dict = field(default_factory=dict)  # voter_id -> 사용한 투표권 수
+
+    def max_votes(self, voter_id) -> int:
+        return self.winning_team_votes if self.teams[voter_id] == self.winning_team else self.losing_team_votes
+
+
+class BallotLedger:
+    def __init__(self, database, max_schedules: int = 64) -> None:
+        """
+        :param max_schedules: How many schedules are kept in memory; the least recently used are evicted.
+        """
+        self.database = database
+        self.max_schedules = max_schedules
+        self._ballots = OrderedDict()  # schedule_id -> Ballot (투표가 없는 일정은 None)
+        self._lock = asyncio.Lock()
+
+    async def _load(self, schedule_id):
+        if schedule_id in self._ballots:
+            self._ballots.move_to_end(schedule_id)
+            return self._ballots[schedule_id]
+        async with self._lock:
+            if schedule_id not in self._ballots:
+                settings, participants = await self.database.get_mvp_ballot_state(schedule_id)
+                ballot = None
+                if settings is not None:
+                    ballot = Ballot(*settings[:3], winning_team=settings[3])
+                    for user_id, team, used_votes in participants:
+                        ballot.teams[str(user_id)] = team
+                        ballot.used[str(user_id)] = used_votes
+                self._ballots[schedule_id] = ballot
+                while len(self._ballots) > self.max_schedules:
+                    self._ballots.popitem(last=False)
+            return self._ballots[schedule_id]
+
+    def invalidate(self, schedule_id=None) -> None:
+        """ 투표 설정이나 경기 결과가 바뀌면 다음 클릭 때 다시 구성 """
+        if schedule_id is None:
+            self._ballots.clear()
+        else:
+            self._ballots.pop(schedule_id, None)
+
+    async def cast(self, schedule_id, voter_id, voted_for_id):
+        """
+        MVP 한 표를 행사합니다.
+
+        :return: A (code, remaining_votes) tuple, code being VOTED, NOT_ELIGIBLE, OWN_TEAM or NO_VOTES_LEFT.
+        """
+        voter_id, voted_for_id = str(voter_id), str(voted_for_id)
+        ballot = await self._load(schedule_id)
+        if ballot is None or voter_id not in ballot.teams or voted_for_id not in ballot.teams:
+            return NOT_ELIGIBLE, 0
+        if not ballot.can_vote_own_team and ballot.teams[voter_id] == ballot.teams[voted_for_id]:
+            return OWN_TEAM, ballot.max_votes(voter_id) - ballot.used[voter_id]
+
+        # 확인과 차감 사이에 await가 없으므로 동시에 클릭해도 한 번씩만 차감됨
+        max_votes = ballot.max_votes(voter_id)
+        if ballot.used[voter_id] >= max_votes:
+            return NO_VOTES_LEFT, 0
+        ballot.used[voter_id] += 1
+        remaining_votes = max_votes - ballot.used[voter_id]
+
+        try:
+            recorded = await self.database.record_mvp_vote_if_allowed(schedule_id, voter_id, voted_for_id, max_votes)
+        except Exception:
+            ballot.used[voter_id] -= 1
+            raise
+        if not recorded:
+            # DB 기준으로 이미 다 썼음 (장부가 어긋난 경우) -> DB를 따름
+            ballot.used[voter_id] = max_votes
+            return NO_VOTES_LEFT, 0
+        return VOTED, remaining_votes
@@ -0,0 +1,56 @@
+"""
+일정 상태 캐시.
+
+확정된 일정과 투표 중인 일정은 거의 모든 명령어가 조회하지만 바뀌는 일은 드뭅니다.
+DatabaseManager가 이 캐시를 소유하고, 일정을 쓰는 메서드가 캐시를 갱신하거나 무효화합니다.
+항목은 (CONFIRMED_SCHEDULE, guild_id)처럼 길드별 키로 저장됩니다.
+"""
+
+CONFIRMED_SCHEDULE = "confirmed"
+VOTING_SCHEDULES = "voting"
+
+
+class ScheduleCache:
+    def __init__(self) -> None:
+        self._entries = {}
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def generation(self) -> int:
+        """
+        캐시가 무효화될 때마다 증가하는 세대 번호.
+
+        조회를 시작하기 전에 세대를 기억해 두었다가 store()에 넘기면,
+        조회 도중 쓰기가 일어난 경우 오래된 결과가 캐시에 들어가지 않습니다.
+        """
+        return self._generation
+
+    def get(self, key):
+        """
+        :return: A (hit, value) tuple.
+        """
+        if key in self._entries:
+            self.stats["hits"] += 1
+            return True, self._entries[key]
+        self.stats["misses"] += 1
+        return False, None
+
+    def store(self, key, value, generation: int) -> bool:
+        """ 조회 결과 저장 (조회 도중 무효화되었다면 버림) """
+        if generation != self._generation:
+            return False
+        self._entries[key] = value
+        return True
+
+    def update(self, key, updater) -> None:
+        """ 캐시된 값이 있으면 updater(value)로 교체, 없으면 무효화 상태 유지 """
+        self._generation += 1
+        if key in self._entries:
+            self._entries[key] = updater(self._entries[key])
+
+    def invalidate(self, *keys) -> None:
+        self._generation += 1
+        self.stats["invalidations"] += 1
+        for key in keys or list(self._entries):
+            self._entries.pop(key, None)
@@ -0,0 +1,149 @@
+"""
+리더보드 엔진.
+
+길드별로 플레이어 전적과 레이팅을 메모리에 두고, 정렬 기준(승률/판수/레이팅)마다 정렬된 리스트를 유지합니다.
+순위 조회는 bisect로 O(log n), 페이지 조회는 리스트 슬라이스라 DB를 다시 읽지 않습니다.
+경기 결과가 기록되면 해당 경기 참가자의 항목만 빼고 다시 끼워 넣습니다.
+"""
+
+import asyncio
+import bisect
+from dataclasses import dataclass
+
+WIN_RATE = "win_rate"
+GAMES = "games"
+RATING = "rating"
+SORT_KEYS = (WIN_RATE, GAMES, RATING)
+
+
+@dataclass
+class PlayerRecord:
+    user_id: str
+    user_name: str
+    wins: int = 0
+    losses: int = 0
+    rating: float = 0.0
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.losses
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def sort_key(self, key: str) -> tuple:
+        """ 오름차순 정렬했을 때 1위가 맨 앞에 오는 키 (동률이면 다음 기준, 이름, ID 순) """
+        if key == WIN_RATE:
+            primary = (-self.win_rate, -self.games)
+        elif key == GAMES:
+            primary = (-self.games, -self.win_rate)
+        else:
+            primary = (-self.rating, -self.games)
+        return (*primary, self.user_name, self.user_id)
+
+
+class Leaderboard:
+    def __init__(self, database) -> None:
+        self.database = database
+        self._records = {}  # guild_id -> {user_id: PlayerRecord}
+        self._rankings = {}  # guild_id -> {sort_key: [(sort_tuple, user_id), ...]}
+        self._generations = {}  # guild_id -> 무효화/갱신마다 증가
+        self._lock = asyncio.Lock()
+
+    async def load(self, guild_id) -> None:
+        """ 길드의 전적과 레이팅으로 순위를 구성 (이미 구성되어 있으면 생략) """
+        guild_id = str(guild_id)
+        if guild_id in self._rankings:
+            return
+        async with self._lock:
+            if guild_id in self._rankings:
+                return
+            ratings = self.database.ratings
+            while True:
+                # 읽는 도중 경기 결과나 무효화가 반영되면 오래된 순위 대신 다시 읽음
+                generation = self._generations.get(guild_id, 0)
+                await ratings.load(guild_id)
+                records = {
+                    str(row[1]): PlayerRecord(str(row[1]), row[2], row[3], row[4], ratings.rating(guild_id, row[1]))
+                    for row in await self.database.get_player_stats(guild_id)
+                }
+                if generation == self._generations.get(guild_id, 0):
+                    break
+            self._records[guild_id] = records
+            self._rankings[guild_id] = {
+                key: sorted((record.sort_key(key), record.user_id) for record in records.values() if record.games)
+                for key in SORT_KEYS
+            }
+
+    def invalidate(self, guild_id=None) -> None:
+        """ 다음 조회 때 DB에서 다시 구성하도록 표시 (guild_id가 없으면 모든 길드) """
+        guild_ids = list(self._rankings) if guild_id is None else [str(guild_id)]
+        for guild_id in guild_ids:
+            self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+            self._records.pop(guild_id, None)
+            self._rankings.pop(guild_id, None)
+
+    def apply_match(self, guild_id, outcomes) -> None:
+        """
+        경기 참가자의 전적과 레이팅을 반영해서 순위를 갱신합니다.
+
+        :param outcomes: (user_id, team, won) rows of one match.
+        """
+        guild_id = str(guild_id)
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+        records = self._records.get(guild_id)
+        if records is None:
+            return
+        if any(str(user_id) not in records for user_id, _, _ in outcomes):
+            # 아직 동기화되지 않은 유저가 있으면 다음 조회 때 다시 구성
+            self.invalidate(guild_id)
+            return
+
+        rankings = self._rankings[guild_id]
+        for user_id, _, won in outcomes:
+            record = records[str(user_id)]
+            self._remove(rankings, record)
+            record.wins += won
+            record.losses += 1 - won
+            record.rating = self.database.ratings.rating(guild_id, record.user_id)
+            self._insert(rankings, record)
+
+    def _remove(self, rankings, record) -> None:
+        if not record.games:
+            return
+        for key, ranking in rankings.items():
+            index = bisect.bisect_left(ranking, (record.sort_key(key), record.user_id))
+            del ranking[index]
+
+    def _insert(self, rankings, record) -> None:
+        for key, ranking in rankings.items():
+            bisect.insort(ranking, (record.sort_key(key), record.user_id))
+
+    def get(self, guild_id, user_id):
+        """ :return: The PlayerRecord of the user, or None when the user is unknown. """
+        return self._records.get(str(guild_id), {}).get(str(user_id))
+
+    def rank(self, guild_id, key: str, user_id):
+        """ :return: The 1-based rank of the user, or None when the user has not played yet. """
+        record = self.get(guild_id, user_id)
+        if record is None or not record.games:
+            return None
+        ranking = self._rankings[str(guild_id)][key]
+        return bisect.bisect_left(ranking, (record.sort_key(key), record.user_id)) + 1
+
+    def size(self, guild_id, key: str = WIN_RATE) -> int:
+        return len(self._rankings.get(str(guild_id), {}).get(key, ()))
+
+    def page(self, guild_id, key: str, page: int, per_page: int = 10) -> list:
+        """
+        :param page: The 0-based page number.
+        :return: A list of (rank, PlayerRecord) tuples.
+        """
+        records = self._records.get(str(guild_id), {})
+        ranking = self._rankings.get(str(guild_id), {}).get(key, [])
+        start = page * per_page
+        return [
+            (start + offset + 1, records[user_id])
+            for offset, (_, user_id) in enumerate(ranking[start:start + per_page])
+        ]
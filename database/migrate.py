@@ -0,0 +1,117 @@
+"""
+버전 관리되는 스키마 마이그레이션.
+
+`migrations/` 디렉토리의 `NNNN_name.sql` 파일을 번호 순서대로 적용하고,
+적용된 버전은 데이터베이스의 `PRAGMA user_version`에 기록합니다.
+각 마이그레이션은 버전 기록과 함께 하나의 트랜잭션으로 실행됩니다.
+"""
+
+import asyncio
+from pathlib import Path
+import re
+
+import aiosqlite
+
+from database import queries
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# 인덱스 이름 -> 해당 인덱스를 타야 하는 핫패스 쿼리와 계획 확인용 파라미터
+# 문장은 DatabaseManager와 같은 database.queries 상수를 사용
+HOT_PATH_QUERIES = {
+    "idx_schedules_guild_status_created_at": [
+        (queries.SELECT_CONFIRMED_SCHEDULE, ("0",)),
+        (queries.SELECT_VOTING_SCHEDULES, ("0",)),
+        (queries.SELECT_VOTE_STATUS, ("0",)),
+    ],
+    "idx_mvp_votes_schedule_voter": [
+        (queries.SELECT_USED_MVP_VOTES, (0, "0")),
+        (queries.INSERT_MVP_VOTE_IF_ALLOWED, {"schedule_id": 0, "voter_id": "0", "voted_for_id": "0", "max_votes": 1}),
+    ],
+    "idx_mvp_vote_settings_schedule": [
+        (queries.SELECT_MVP_BALLOT_SETTINGS, (0,)),
+    ],
+    "idx_mvp_votes_schedule_voted_for": [
+        (queries.SELECT_MVP_VOTES, (0,)),
+    ],
+    "idx_player_stats_guild_user_name": [
+        (queries.SELECT_USER_ID_BY_NAME, ("0", "")),
+    ],
+    "idx_match_player_results_guild_match": [
+        (queries.SELECT_MATCH_HISTORY, ("0",)),
+    ],
+}
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    마이그레이션 파일 목록을 (version, name, sql) 튜플로 읽어옵니다.
+
+    :param directory: The directory that holds the numbered migration files.
+    :return: The migrations sorted by version.
+    """
+    migrations = []
+    for file_path in directory.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(file_path.name)
+        if match:
+            migrations.append(
+                (int(match.group(1)), match.group(2), file_path.read_text(encoding="utf-8"))
+            )
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if versions != list(range(1, len(versions) + 1)):
+        raise RuntimeError(f"Migration versions must be contiguous from 1, got {versions}")
+    return migrations
+
+
+async def get_schema_version(connection: aiosqlite.Connection) -> int:
+    async with connection.execute("PRAGMA user_version") as cursor:
+        result = await cursor.fetchone()
+        return result[0]
+
+
+async def migrate(connection: aiosqlite.Connection, directory: Path = MIGRATIONS_DIR) -> list:
+    """
+    아직 적용되지 않은 마이그레이션을 순서대로 적용합니다.
+
+    :param connection: The connection the migrations are applied on.
+    :param directory: The directory that holds the numbered migration files.
+    :return: The versions that have been applied.
+    """
+    current_version = await get_schema_version(connection)
+    migrations = await asyncio.to_thread(load_migrations, directory)
+
+    applied = []
+    for version, name, sql in migrations:
+        if version <= current_version:
+            continue
+        try:
+            await connection.executescript(
+                f"BEGIN;\n{sql}\n;\nPRAGMA user_version = {version};\nCOMMIT;"
+            )
+        except Exception as e:
+            await connection.rollback()
+            raise RuntimeError(f"Migration {version:04d}_{name} failed: {e}") from e
+        applied.append(version)
+    return applied
+
+
+async def verify_query_plans(connection: aiosqlite.Connection) -> list:
+    """
+    핫패스 쿼리가 전용 인덱스를 사용하는지 EXPLAIN QUERY PLAN으로 확인합니다.
+
+    SQLite 업그레이드로 쿼리 계획이 바뀌어도 봇은 계속 동작해야 하므로 예외 대신 문제 목록을 반환합니다.
+    (벤치마크는 목록이 비어 있지 않으면 실패로 처리)
+
+    :return: One message per query that does not use the index it was written for.
+    """
+    problems = []
+    for index_name, checks in HOT_PATH_QUERIES.items():
+        for query, parameters in checks:
+            async with connection.execute(f"EXPLAIN QUERY PLAN {query}", parameters) as cursor:
+                plan = [row[3] for row in await cursor.fetchall()]
+            if not any(index_name in detail for detail in plan):
+                problems.append(f"Query does not use {index_name}: {' '.join(query.split())}\nPlan: {plan}")
+    return problems
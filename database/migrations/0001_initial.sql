@@ -86,4 +86,11 @@ CREATE TABLE IF NOT EXISTS `mvp_awards` (
   `user_name` TEXT,
   `total_votes` INTEGER,
   `award_date` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- 동기화 상태(워터마크) 테이블
+CREATE TABLE IF NOT EXISTS `sync_state` (
+  `key` TEXT PRIMARY KEY,
+  `value` TEXT,
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,11 @@
+-- 확정/투표 중 일정 조회 (get_confirmed_schedule, get_voting_schedules)
+CREATE INDEX IF NOT EXISTS `idx_schedules_status_created_at` ON `schedules` (`status`, `created_at`, `date`);
+
+-- 사용자별 MVP 투표 사용량 조회 (check_user_voted)
+CREATE INDEX IF NOT EXISTS `idx_mvp_votes_schedule_voter` ON `mvp_votes` (`schedule_id`, `voter_id`, `vote_count`);
+
+-- 경기별 MVP 득표 집계 (get_mvp_votes)
+CREATE INDEX IF NOT EXISTS `idx_mvp_votes_schedule_voted_for` ON `mvp_votes` (`schedule_id`, `voted_for_id`, `vote_count`);
+
+-- 닉네임으로 유저 조회 (get_user_id_by_name)
+CREATE INDEX IF NOT EXISTS `idx_player_stats_user_name` ON `player_stats` (`user_name`, `user_id`);
@@ -0,0 +1,28 @@
+-- 경기별 플레이어 결과 원장 (전적 재계산/정정의 기준 데이터)
+CREATE TABLE IF NOT EXISTS `match_player_results` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `match_id` INTEGER NOT NULL,
+  `schedule_id` INTEGER NOT NULL,
+  `user_id` TEXT NOT NULL,
+  `team` INTEGER NOT NULL,
+  `won` INTEGER NOT NULL,
+  `recorded_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (`match_id`) REFERENCES `match_results`(`id`),
+  UNIQUE(`match_id`, `user_id`)
+);
+
+-- 일정별 정정 (void_match_result)
+CREATE INDEX IF NOT EXISTS `idx_match_player_results_schedule` ON `match_player_results` (`schedule_id`, `user_id`, `won`);
+
+-- 유저별 재집계 (recompute_player_stats)
+CREATE INDEX IF NOT EXISTS `idx_match_player_results_user` ON `match_player_results` (`user_id`, `won`);
+
+-- 일정별 경기 결과 조회 (get_match_result)
+CREATE INDEX IF NOT EXISTS `idx_match_results_schedule` ON `match_results` (`schedule_id`);
+
+-- 기존 경기 결과로 원장 채우기
+INSERT OR IGNORE INTO `match_player_results` (`match_id`, `schedule_id`, `user_id`, `team`, `won`)
+SELECT m.id, m.schedule_id, p.user_id, p.team, p.team = m.winning_team
+FROM match_results m
+JOIN participants p ON p.schedule_id = m.schedule_id
+WHERE p.team IS NOT NULL;
@@ -0,0 +1,11 @@
+-- 플레이어 레이팅 테이블 (Glicko 방식: rating ± rd, 길드별)
+-- 원장에서 다시 계산할 수 있으므로 비어 있으면 첫 조회 때 백필
+CREATE TABLE IF NOT EXISTS `player_ratings` (
+  `guild_id` TEXT NOT NULL,
+  `user_id` TEXT NOT NULL,
+  `rating` REAL NOT NULL DEFAULT 1500,
+  `rd` REAL NOT NULL DEFAULT 350,
+  `games` INTEGER NOT NULL DEFAULT 0,
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`guild_id`, `user_id`)
+);
@@ -0,0 +1,41 @@
+-- 길드(서버)별 데이터 분리
+-- schedules가 guild_id를 가지고, participants/schedule_votes/mvp_votes/match_results 등은 schedule_id로 길드에 속합니다.
+-- 기존 행의 guild_id는 NULL로 남으며, 봇이 하나의 길드에만 있으면 시작 시 그 길드로 편입됩니다. (adopt_legacy_rows)
+
+ALTER TABLE `schedules` ADD COLUMN `guild_id` TEXT;
+
+-- 확정/투표 중 일정 조회를 길드 단위로 (get_confirmed_schedule, get_voting_schedules)
+DROP INDEX IF EXISTS `idx_schedules_status_created_at`;
+CREATE INDEX IF NOT EXISTS `idx_schedules_guild_status_created_at` ON `schedules` (`guild_id`, `status`, `created_at`, `date`);
+
+-- 날짜별 일정 조회 (get_today_mvp)
+CREATE INDEX IF NOT EXISTS `idx_schedules_guild_date` ON `schedules` (`guild_id`, `date`);
+
+-- 플레이어 전적은 길드마다 따로 관리: UNIQUE(user_id) -> UNIQUE(guild_id, user_id)
+-- SQLite는 제약 조건을 바꿀 수 없으므로 테이블을 다시 만듭니다. (기존 컬럼 순서 유지)
+CREATE TABLE `player_stats_new` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `user_id` TEXT,
+  `user_name` TEXT,
+  `wins` INTEGER DEFAULT 0,
+  `losses` INTEGER DEFAULT 0,
+  `guild_id` TEXT,
+  UNIQUE(`guild_id`, `user_id`)
+);
+INSERT INTO `player_stats_new` (`id`, `user_id`, `user_name`, `wins`, `losses`)
+SELECT `id`, `user_id`, `user_name`, `wins`, `losses` FROM `player_stats`;
+DROP TABLE `player_stats`;
+ALTER TABLE `player_stats_new` RENAME TO `player_stats`;
+
+-- 닉네임으로 유저 조회 (get_user_id_by_name)
+CREATE INDEX IF NOT EXISTS `idx_player_stats_guild_user_name` ON `player_stats` (`guild_id`, `user_name`, `user_id`);
+
+-- 경기 원장에 길드를 기록해서 길드별 재계산이 다른 길드의 행을 훑지 않도록 함
+ALTER TABLE `match_player_results` ADD COLUMN `guild_id` TEXT;
+DROP INDEX IF EXISTS `idx_match_player_results_user`;
+CREATE INDEX IF NOT EXISTS `idx_match_player_results_guild_user` ON `match_player_results` (`guild_id`, `user_id`, `won`);
+CREATE INDEX IF NOT EXISTS `idx_match_player_results_guild_match` ON `match_player_results` (`guild_id`, `match_id`, `user_id`);
+
+-- MVP 수상 기록
+ALTER TABLE `mvp_awards` ADD COLUMN `guild_id` TEXT;
+CREATE INDEX IF NOT EXISTS `idx_mvp_awards_guild_date` ON `mvp_awards` (`guild_id`, `date`);
@@ -0,0 +1,2 @@
+-- 일정별 MVP 투표 설정 조회 (get_mvp_ballot_state, get_mvp_vote_settings)
+CREATE INDEX IF NOT EXISTS `idx_mvp_vote_settings_schedule` ON `mvp_vote_settings` (`schedule_id`);
@@ -0,0 +1,65 @@
+"""
+핫패스 SQL.
+
+DatabaseManager와 database.migrate.verify_query_plans가 같은 문장을 쓰도록 모아 둔 상수입니다.
+쿼리를 바꾸면 인덱스 검증도 자동으로 바뀐 쿼리를 대상으로 합니다.
+"""
+
+SELECT_CONFIRMED_SCHEDULE = '''
+    SELECT id, date
+    FROM schedules
+    WHERE guild_id = ? AND status = 'confirmed'
+    ORDER BY created_at DESC
+    LIMIT 1
+'''
+
+SELECT_VOTING_SCHEDULES = '''
+    SELECT s.id, s.date, COUNT(sv.id) as vote_count
+    FROM schedules s
+    LEFT JOIN schedule_votes sv ON s.id = sv.schedule_id
+    WHERE s.guild_id = ? AND s.status = 'voting'
+    GROUP BY s.id
+    ORDER BY vote_count DESC, s.date ASC
+'''
+
+SELECT_VOTE_STATUS = '''
+    SELECT s.id, s.date, COUNT(sv.id) OVER (PARTITION BY s.id) AS vote_count, sv.user_name
+    FROM schedules s
+    LEFT JOIN schedule_votes sv ON s.id = sv.schedule_id
+    WHERE s.guild_id = ? AND s.status = 'voting'
+    ORDER BY vote_count DESC, s.date ASC, s.id ASC, sv.id ASC
+'''
+
+SELECT_MATCH_HISTORY = (
+    'SELECT match_id, user_id, team, won FROM match_player_results WHERE guild_id = ? ORDER BY match_id, user_id'
+)
+
+SELECT_USER_ID_BY_NAME = "SELECT user_id FROM player_stats WHERE guild_id = ? AND user_name = ?"
+
+SELECT_MVP_BALLOT_SETTINGS = '''
+    SELECT s.winning_team_votes, s.losing_team_votes, s.can_vote_own_team, r.winning_team
+    FROM mvp_vote_settings s
+    JOIN match_results r ON r.schedule_id = s.schedule_id
+    WHERE s.schedule_id = ?
+    ORDER BY s.id DESC, r.id DESC
+    LIMIT 1
+'''
+
+INSERT_MVP_VOTE_IF_ALLOWED = '''
+    INSERT INTO mvp_votes (schedule_id, voter_id, voted_for_id, vote_count)
+    SELECT :schedule_id, :voter_id, :voted_for_id, 1
+    WHERE (
+        SELECT COALESCE(SUM(vote_count), 0) FROM mvp_votes
+        WHERE schedule_id = :schedule_id AND voter_id = :voter_id
+    ) < :max_votes
+'''
+
+SELECT_MVP_VOTES = '''
+    SELECT voted_for_id, SUM(vote_count) as total_votes
+    FROM mvp_votes
+    WHERE schedule_id = ?
+    GROUP BY voted_for_id
+    ORDER BY total_votes DESC
+'''
+
+SELECT_USED_MVP_VOTES = 'SELECT SUM(vote_count) FROM mvp_votes WHERE schedule_id = ? AND voter_id = ?'
@@ -0,0 +1,186 @@
+"""
+플레이어 레이팅 (팀 대전용 Glicko-1 변형).
+
+각 플레이어는 rating(실력 추정치)과 rd(불확실성)를 가집니다. 한 경기의 결과는
+"내 팀 평균 레이팅 vs 상대 팀 평균 레이팅"의 기대 승률과 비교해서 반영하고,
+rd가 큰(판수가 적은) 플레이어일수록 크게 움직입니다.
+
+- update_match(): 경기 하나를 참가자 수만큼의 벡터 연산으로 반영 (O(10))
+- replay(): match_player_results 원장 전체를 한 번에 다시 계산 (백필, 파라미터 튜닝용)
+- RatingBook: 레이팅을 메모리에 캐시하고 player_ratings 테이블에 저장
+"""
+
+import asyncio
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+Q = math.log(10) / 400
+
+
+@dataclass(frozen=True)
+class RatingParams:
+    initial_rating: float = 1500.0
+    initial_rd: float = 350.0
+    # 경기마다 rd에 더해지는 불확실성 (오래 쉬어도 레이팅이 굳지 않도록)
+    rd_inflation: float = 15.0
+    min_rd: float = 40.0
+
+
+def _g(rd):
+    return 1 / np.sqrt(1 + 3 * Q**2 * rd**2 / math.pi**2)
+
+
+def update_match(ratings, rds, teams, winning_team, params: RatingParams = RatingParams()):
+    """
+    한 경기 결과를 참가자 전원에게 반영합니다.
+
+    :param ratings: The rating of each participant.
+    :param rds: The rating deviation of each participant.
+    :param teams: The team (1 or 2) of each participant.
+    :param winning_team: The team that won.
+    :return: A (new_ratings, new_rds, expected) tuple; expected is each participant's predicted win probability.
+    """
+    ratings = np.asarray(ratings, dtype=float)
+    rds = np.minimum(np.sqrt(np.asarray(rds, dtype=float) ** 2 + params.rd_inflation**2), params.initial_rd)
+    teams = np.asarray(teams)
+    on_team_1 = teams == 1
+
+    # 팀 평균 레이팅과 팀 불확실성(RMS)
+    team_ratings = np.array([ratings[on_team_1].mean(), ratings[~on_team_1].mean()])
+    team_rds = np.array([np.sqrt((rds[on_team_1] ** 2).mean()), np.sqrt((rds[~on_team_1] ** 2).mean())])
+    own = np.where(on_team_1, 0, 1)
+    opponent = 1 - own
+
+    g = _g(team_rds[opponent])
+    expected = 1 / (1 + 10 ** (-g * (team_ratings[own] - team_ratings[opponent]) / 400))
+    score = (teams == winning_team).astype(float)
+
+    d_squared_inv = Q**2 * g**2 * expected * (1 - expected)
+    precision = 1 / rds**2 + d_squared_inv
+    new_ratings = ratings + Q / precision * g * (score - expected)
+    new_rds = np.maximum(np.sqrt(1 / precision), params.min_rd)
+    return new_ratings, new_rds, expected
+
+
+def replay(history, params: RatingParams = RatingParams()):
+    """
+    경기 원장 전체를 순서대로 다시 계산합니다.
+
+    :param history: (match_id, user_id, team, won) rows, ordered by match_id.
+    :return: A (ratings, log_loss) tuple; ratings maps user_id to (rating, rd, games) and
+        log_loss is the mean prediction loss over all matches, useful for tuning `params`.
+    """
+    if not history:
+        return {}, 0.0
+
+    match_ids = np.array([row[0] for row in history])
+    user_ids, player_index = np.unique([str(row[1]) for row in history], return_inverse=True)
+    teams = np.array([row[2] for row in history])
+    won = np.array([row[3] for row in history], dtype=bool)
+
+    ratings = np.full(len(user_ids), params.initial_rating)
+    rds = np.full(len(user_ids), params.initial_rd)
+    games = np.zeros(len(user_ids), dtype=int)
+
+    losses = []
+    boundaries = np.flatnonzero(np.diff(match_ids)) + 1
+    for rows in np.split(np.arange(len(history)), boundaries):
+        players = player_index[rows]
+        winners = teams[rows][won[rows]]
+        if len(winners) == 0 or len(np.unique(teams[rows])) < 2:
+            continue
+        new_ratings, new_rds, expected = update_match(
+            ratings[players], rds[players], teams[rows], winners[0], params
+        )
+        ratings[players] = new_ratings
+        rds[players] = new_rds
+        games[players] += 1
+        losses.append(-np.log(np.clip(expected[won[rows]], 1e-12, 1)).mean())
+
+    # np.unique는 np.str_을 돌려주므로 다른 곳과 같은 str 키로 변환
+    result = {
+        str(user_id): (float(ratings[i]), float(rds[i]), int(games[i]))
+        for i, user_id in enumerate(user_ids)
+    }
+    return result, float(np.mean(losses)) if losses else 0.0
+
+
+class RatingBook:
+    def __init__(self, database, params: RatingParams = RatingParams()) -> None:
+        self.database = database
+        self.params = params
+        self._ratings = {}  # guild_id -> {user_id: (rating, rd, games)}
+        self._lock = asyncio.Lock()
+
+    async def load(self, guild_id) -> None:
+        """ 길드의 player_ratings를 메모리로 읽어옴 (비어 있으면 원장에서 백필) """
+        guild_id = str(guild_id)
+        if guild_id in self._ratings:
+            return
+        async with self._lock:
+            if guild_id in self._ratings:
+                return
+            rows = await self.database.get_player_ratings(guild_id)
+            self._ratings[guild_id] = {str(user_id): (rating, rd, games) for user_id, rating, rd, games in rows}
+        if not self._ratings[guild_id]:
+            await self.rebuild(guild_id)
+
+    def get(self, guild_id, user_id):
+        """ :return: A (rating, rd, games) tuple; unrated players get the initial values. """
+        return self._ratings.get(str(guild_id), {}).get(
+            str(user_id), (self.params.initial_rating, self.params.initial_rd, 0)
+        )
+
+    def rating(self, guild_id, user_id) -> float:
+        return self.get(guild_id, user_id)[0]
+
+    def all(self, guild_id) -> dict:
+        return dict(self._ratings.get(str(guild_id), {}))
+
+    def apply_match(self, guild_id, outcomes):
+        """
+        경기 결과를 메모리에 반영하고 저장할 행을 반환합니다.
+
+        :param outcomes: (user_id, team, won) rows of one match.
+        :return: (guild_id, user_id, rating, rd, games) rows to persist.
+        """
+        guild_id = str(guild_id)
+        outcomes = [(str(user_id), team, won) for user_id, team, won in outcomes]
+        winners = [team for _, team, won in outcomes if won]
+        if not winners or len({team for _, team, _ in outcomes}) < 2:
+            return []
+
+        current = [self.get(guild_id, user_id) for user_id, _, _ in outcomes]
+        new_ratings, new_rds, _ = update_match(
+            [rating for rating, _, _ in current],
+            [rd for _, rd, _ in current],
+            [team for _, team, _ in outcomes],
+            winners[0],
+            self.params,
+        )
+        ratings = self._ratings.setdefault(guild_id, {})
+        rows = []
+        for (user_id, _, _), (_, _, games), rating, rd in zip(outcomes, current, new_ratings, new_rds):
+            ratings[user_id] = (float(rating), float(rd), games + 1)
+            rows.append((guild_id, user_id, float(rating), float(rd), games + 1))
+        return rows
+
+    async def rebuild(self, guild_id, params: RatingParams = None) -> float:
+        """
+        길드의 원장 전체로 레이팅을 다시 계산해서 저장합니다. (백필, 경기 결과 정정, 파라미터 변경 시)
+
+        :return: The mean prediction log loss of the replay.
+        """
+        guild_id = str(guild_id)
+        async with self._lock:
+            if params is not None:
+                self.params = params
+            history = await self.database.get_match_history(guild_id)
+            ratings, log_loss = await asyncio.to_thread(replay, history, self.params)
+            await self.database.replace_player_ratings(
+                guild_id, [(guild_id, user_id, *values) for user_id, values in ratings.items()]
+            )
+            self._ratings[guild_id] = ratings
+            return log_loss
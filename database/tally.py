@@ -0,0 +1,118 @@
+"""
+일정 투표 집계 엔진.
+
+길드별로 투표 중인 일정의 date -> schedule_id 매핑과 일정별 투표자 목록을 메모리에 유지합니다.
+버튼 클릭은 메모리에서 바로 처리하고, DB 반영은 백그라운드 작업이 순서대로 모아서 기록합니다(write-behind).
+재시작 후 길드별 첫 클릭에서 schedule_votes 테이블로부터 다시 구성됩니다.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger("discord_bot")
+
+
+class VoteTally:
+    def __init__(self, database) -> None:
+        self.database = database
+        self._schedule_ids = {}  # guild_id -> {date: schedule_id}
+        self._voters = {}  # schedule_id -> {user_id: user_name}
+        self._loaded = set()  # 집계가 구성된 guild_id
+        self._generations = {}  # guild_id -> 일정 추가/제거/무효화마다 증가
+        self._load_lock = asyncio.Lock()
+        self._pending_writes = asyncio.Queue()
+        self._writer_task = None
+
+    async def load(self, guild_id) -> None:
+        """ 길드의 집계를 schedule_votes 테이블에서 다시 구성 (이미 구성되어 있으면 생략) """
+        guild_id = str(guild_id)
+        async with self._load_lock:
+            if guild_id in self._loaded:
+                return
+            self._generations.setdefault(guild_id, 0)
+            while True:
+                # 읽는 도중 일정이 추가/제거되거나 무효화되면 오래된 매핑 대신 다시 읽음
+                generation = self._generations[guild_id]
+                await self.flush()
+                schedule_ids = dict(await self.database.get_voting_schedule_ids(guild_id))
+                voters = {schedule_id: {} for schedule_id in schedule_ids.values()}
+                for schedule_id, user_id, user_name in await self.database.get_open_votes(guild_id):
+                    voters.setdefault(schedule_id, {})[str(user_id)] = user_name
+                if generation == self._generations[guild_id]:
+                    break
+            for schedule_id in self._schedule_ids.get(guild_id, {}).values():
+                self._voters.pop(schedule_id, None)
+            self._schedule_ids[guild_id] = schedule_ids
+            self._voters.update(voters)
+            self._loaded.add(guild_id)
+
+    def invalidate(self, guild_id=None) -> None:
+        """ 다음 조회 때 DB에서 다시 구성하도록 표시 (guild_id가 없으면 모든 길드) """
+        guild_ids = list(self._generations) if guild_id is None else [str(guild_id)]
+        for guild_id in guild_ids:
+            self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+            self._loaded.discard(guild_id)
+
+    def add_schedule(self, guild_id, schedule_id, date) -> None:
+        guild_id = str(guild_id)
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+        if guild_id in self._loaded:
+            self._schedule_ids[guild_id][date] = schedule_id
+            self._voters.setdefault(schedule_id, {})
+
+    def remove_schedule(self, guild_id, schedule_id) -> None:
+        guild_id = str(guild_id)
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+        if guild_id in self._loaded:
+            self._schedule_ids[guild_id] = {
+                date: id_ for date, id_ in self._schedule_ids[guild_id].items() if id_ != schedule_id
+            }
+            self._voters.pop(schedule_id, None)
+
+    async def toggle(self, guild_id, date, user_id, user_name):
+        """
+        투표 토글 (이미 투표했으면 취소, 아니면 투표).
+
+        :return: A (schedule_id, voted, vote_count) tuple, or None when the date is not open for voting.
+        """
+        guild_id = str(guild_id)
+        # load()가 DB에서 읽은 문자열 ID와 같은 키를 쓰도록 정규화
+        user_id = str(user_id)
+        if guild_id not in self._loaded:
+            await self.load(guild_id)
+
+        schedule_id = self._schedule_ids[guild_id].get(date)
+        if schedule_id is None:
+            return None
+
+        voters = self._voters[schedule_id]
+        if user_id in voters:
+            del voters[user_id]
+            voted = False
+        else:
+            voters[user_id] = user_name
+            voted = True
+
+        self._pending_writes.put_nowait((voted, schedule_id, user_id, user_name))
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.ensure_future(self._write_behind())
+        return schedule_id, voted, len(voters)
+
+    async def flush(self) -> None:
+        """ 대기 중인 투표 변경이 DB에 모두 기록될 때까지 대기 """
+        await self._pending_writes.join()
+
+    async def _write_behind(self) -> None:
+        while not self._pending_writes.empty():
+            # 쌓여 있는 변경을 한 번에 꺼내 하나의 커밋으로 기록
+            changes = []
+            while not self._pending_writes.empty():
+                changes.append(self._pending_writes.get_nowait())
+            try:
+                await self.database.apply_vote_changes(changes)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(changes)} vote change(s), rebuilding tally\n❌ {type(e).__name__}: {e}")
+                self.invalidate()
+            finally:
+                for _ in changes:
+                    self._pending_writes.task_done()
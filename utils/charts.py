@@ -0,0 +1,115 @@
+"""
+투표 현황 차트 렌더링.
+
+matplotlib 렌더링은 수백 ms 동안 CPU를 점유하므로 이벤트 루프가 아닌 별도 프로세스에서 실행합니다.
+전역 pyplot 상태 대신 Figure 객체 API를 사용하고, 같은 집계 스냅샷에 대해서는
+렌더링된 PNG 바이트를 캐시에서 재사용합니다.
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import io
+import multiprocessing
+
+from utils.fonts import resolve_korean_font
+from utils.lazy import LazyModule
+
+# 플로팅 스택은 워커 프로세스에서 처음 렌더링할 때 import 됩니다.
+font_manager = LazyModule("matplotlib.font_manager")
+backend_agg = LazyModule("matplotlib.backends.backend_agg")
+mpl_figure = LazyModule("matplotlib.figure")
+sns = LazyModule("seaborn")
+
+
+@lru_cache(maxsize=None)
+def _font_properties(font_path):
+    return font_manager.FontProperties(fname=font_path)
+
+
+def render_vote_chart(dates, counts, font_path=None) -> bytes:
+    """
+    날짜별 투표 수 막대 차트를 PNG 바이트로 렌더링합니다. (워커 프로세스에서 실행)
+
+    :param dates: The candidate dates, in display order.
+    :param counts: The vote count of each date.
+    :param font_path: An optional font file used for the labels.
+    """
+    with sns.axes_style("whitegrid"):
+        figure = mpl_figure.Figure(figsize=(10, 6))
+        backend_agg.FigureCanvasAgg(figure)
+        ax = figure.add_subplot()
+    sns.barplot(x=list(counts), y=list(dates), hue=list(dates), palette="Blues_d", legend=False, ax=ax)
+    # ax.set_xlabel('투표 수')
+    ax.set_xlabel('N')
+    # ax.set_title('현재 투표 현황')
+    ax.set_title('Total Voting Count')
+
+    if font_path:
+        font = _font_properties(font_path)
+        for label in [ax.title, ax.xaxis.label, *ax.get_yticklabels()]:
+            label.set_fontproperties(font)
+
+    buf = io.BytesIO()
+    figure.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+class ChartRenderer:
+    def __init__(self, max_workers: int = 1, cache_size: int = 32, font_path: str | None = None) -> None:
+        self.max_workers = max_workers
+        self.font_path = resolve_korean_font(font_path)
+        self.cache_size = cache_size
+        self.stats = {"hits": 0, "misses": 0}
+        self._executor = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 봇 프로세스에는 aiosqlite, 로그, 감시 스레드가 돌고 있어서 fork하면 다른 스레드가 잡고 있던
+            # 잠금을 물려받아 멈출 수 있으므로 새 인터프리터에서 워커를 시작 (forkserver가 없는 Windows는 spawn)
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context(method)
+            )
+        return self._executor
+
+    async def render_vote_chart(self, snapshot) -> bytes:
+        """
+        집계 스냅샷으로 투표 현황 차트를 렌더링합니다.
+
+        :param snapshot: A date-sorted tuple of (date, vote_count) pairs.
+        :return: The PNG bytes of the chart.
+        """
+        key = ("vote_chart", snapshot)
+        if key in self._cache:
+            self.stats["hits"] += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        # 같은 스냅샷을 동시에 요청하면 렌더링은 한 번만 수행
+        if key not in self._inflight:
+            self.stats["misses"] += 1
+            ordered = sorted(snapshot, key=lambda item: item[1], reverse=True)
+            dates = [date for date, _ in ordered]
+            counts = [count for _, count in ordered]
+            loop = asyncio.get_running_loop()
+            self._inflight[key] = loop.run_in_executor(
+                self._get_executor(), render_vote_chart, dates, counts, self.font_path
+            )
+        try:
+            image = await asyncio.shield(self._inflight[key])
+        finally:
+            self._inflight.pop(key, None)
+
+        self._cache[key] = image
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return image
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
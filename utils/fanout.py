@@ -0,0 +1,85 @@
+"""
+DM 일괄 발송기.
+
+여러 사용자에게 보내는 DM을 동시에, 하지만 동시 요청 수를 제한해서 발송합니다.
+라우트별 rate limit 버킷은 discord.py HTTP 클라이언트가 관리하고(429와 5xx 응답 시 대기 후 재시도),
+여기서는 동시성 제한, 캐시에 없는 사용자의 fetch_user 조회, 연결 실패 재시도를 담당합니다.
+시간 초과처럼 요청이 이미 전송되었을 수 있는 오류는 중복 DM을 막기 위해 재시도하지 않습니다.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+
+import aiohttp
+import discord
+
+
+@dataclass
+class FanOutReport:
+    delivered: list = field(default_factory=list)
+    failed: list = field(default_factory=list)  # (user_id, reason)
+
+    @property
+    def total(self) -> int:
+        return len(self.delivered) + len(self.failed)
+
+
+class DMDispatcher:
+    def __init__(self, bot, concurrency: int = 5, max_attempts: int = 3, retry_delay: float = 1.0) -> None:
+        """
+        :param concurrency: The maximum number of DMs in flight at once.
+        :param max_attempts: How many times a DM is tried while the connection cannot be established.
+        :param retry_delay: The base delay in seconds of the exponential backoff between attempts.
+        """
+        self.bot = bot
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    async def send_all(self, messages) -> FanOutReport:
+        """
+        DM을 동시에 발송하고 결과를 모아서 반환합니다.
+
+        :param messages: A list of (user_id, send_kwargs) tuples, send_kwargs being passed to `User.send`.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._send(semaphore, int(user_id), kwargs) for user_id, kwargs in messages)
+        )
+
+        report = FanOutReport()
+        for (user_id, _), reason in zip(messages, results):
+            if reason is None:
+                report.delivered.append(user_id)
+            else:
+                report.failed.append((user_id, reason))
+        return report
+
+    async def _send(self, semaphore: asyncio.Semaphore, user_id: int, kwargs: dict):
+        """
+        :return: None on success, otherwise the reason of the failure.
+        """
+        async with semaphore:
+            user = self.bot.get_user(user_id)
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    if user is None:
+                        user = await self.bot.fetch_user(user_id)
+                    await user.send(**kwargs)
+                    return None
+                except discord.NotFound:
+                    return "사용자를 찾을 수 없음"
+                except discord.Forbidden:
+                    return "DM 수신 거부"
+                except discord.HTTPException as e:
+                    # 429와 5xx는 discord.py가 이미 재시도한 결과
+                    return f"HTTP {e.status}"
+                except aiohttp.ClientConnectorError as e:
+                    # 연결 자체가 안 된 경우만 요청이 전송되지 않았음이 확실하므로 재시도
+                    reason = type(e).__name__
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    return type(e).__name__
+
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+            return reason
@@ -0,0 +1,38 @@
+"""
+차트용 한글 폰트 탐색.
+
+설정된 경로 -> 번들 폰트(asset/fonts/NanumGothic.ttf) -> OS별 시스템 폰트 순서로 찾고,
+결과는 프로세스당 한 번만 계산합니다.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+BUNDLED_FONT_PATH = Path(__file__).parent.parent.resolve() / "asset" / "fonts" / "NanumGothic.ttf"
+
+SYSTEM_FONT_CANDIDATES = (
+    # Windows
+    "C:\\Windows\\Fonts\\malgun.ttf",
+    # Linux
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    # macOS
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+    "/Library/Fonts/AppleGothic.ttf",
+)
+
+
+@lru_cache(maxsize=None)
+def resolve_korean_font(preferred: str | None = None) -> str | None:
+    """
+    한글을 표시할 수 있는 폰트 파일 경로를 반환합니다.
+
+    :param preferred: An optional font path that takes precedence when it exists.
+    :return: The font path, or None when no Korean font could be found.
+    """
+    candidates = [preferred, str(BUNDLED_FONT_PATH), *SYSTEM_FONT_CANDIDATES]
+    for candidate in candidates:
+        if candidate and Path(candidate).is_file():
+            return candidate
+    return None
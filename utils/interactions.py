@@ -0,0 +1,172 @@
+"""
+상호작용 응답 기한 가드.
+
+Discord는 상호작용(슬래시 명령어, 버튼 클릭)에 3초 안에 응답하지 않으면 "상호작용 실패"로 처리합니다.
+AckGuard는 핸들러가 응답하기 전에 예산(ack_budget_ms)이 지나면 대신 defer하고,
+이후의 응답은 followup으로 보내서 DB가 느릴 때도 기한을 넘기지 않도록 합니다.
+응답까지 걸린 시간은 핸들러별 "ack" 히스토그램(utils.metrics)으로 모아서 기한에 얼마나 가까운지 볼 수 있습니다.
+
+- 하이브리드 명령어: 봇이 GuardedContext를 만들고, ctx.send/ctx.defer가 가드를 거칩니다.
+- 컴포넌트 콜백: @guarded("이름")으로 감싸고 interaction.response 대신 respond(interaction, ...)로 응답합니다.
+"""
+
+import asyncio
+import functools
+import time
+
+import discord
+from discord.ext import commands
+
+from utils.metrics import registry
+
+DEFAULT_ACK_BUDGET = 2.0
+GUARD_KEY = "ack_guard"
+
+# 응답까지 걸린 시간 히스토그램의 구간 상한 (초), 기한(3초) 근처를 촘촘하게
+ACK_BUCKETS = (0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0)
+registry.set_buckets("ack", ACK_BUCKETS)
+
+
+class AckGuard:
+    def __init__(self, interaction: discord.Interaction, handler: str, budget: float = DEFAULT_ACK_BUDGET,
+                 ephemeral: bool = False) -> None:
+        """
+        :param handler: The name the time-to-ack is recorded under.
+        :param budget: Seconds after which the interaction is deferred if nothing has been sent yet; 0 defers immediately.
+        :param ephemeral: Whether the automatic deferral (and so the first followup) is ephemeral.
+        """
+        self.interaction = interaction
+        self.handler = handler
+        self.budget = budget
+        self.ephemeral = ephemeral
+        self.lock = asyncio.Lock()
+        self.started = time.perf_counter()
+        self.acked = False
+        self._watcher = None
+        self._deferring = False
+
+    def start(self) -> "AckGuard":
+        self.interaction.extras[GUARD_KEY] = self
+        self._watcher = asyncio.create_task(self._defer_after_budget())
+        return self
+
+    def close(self) -> None:
+        # 이미 보내고 있는 defer 요청은 끊지 않음
+        if self._watcher is not None and not self._deferring:
+            self._watcher.cancel()
+        self._watcher = None
+
+    async def __aenter__(self) -> "AckGuard":
+        return self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    async def _defer_after_budget(self) -> None:
+        await asyncio.sleep(self.budget)
+        self._deferring = True
+        try:
+            await self.defer(automatic=True)
+        except discord.HTTPException:
+            # defer에 실패해도 핸들러의 응답은 그대로 시도됨
+            pass
+
+    def _observe(self, deferred: bool) -> None:
+        if self.acked:
+            return
+        self.acked = True
+        registry.observe("ack", self.handler, time.perf_counter() - self.started)
+        if deferred:
+            registry.increment("ack_deferred", "ack", self.handler)
+
+    async def defer(self, ephemeral: bool = None, automatic: bool = False) -> None:
+        """ 아직 응답하지 않았으면 defer (이미 응답했으면 아무것도 하지 않음) """
+        async with self.lock:
+            if self.interaction.response.is_done() or self.interaction.is_expired():
+                return
+            try:
+                await self.interaction.response.defer(
+                    ephemeral=self.ephemeral if ephemeral is None else ephemeral, thinking=True
+                )
+            except discord.InteractionResponded:
+                pass
+            self._observe(deferred=automatic)
+
+    async def send(self, **kwargs):
+        """ 첫 응답은 response.send_message로, defer한 뒤에는 followup으로 보냅니다. """
+        async with self.lock:
+            if not self.interaction.response.is_done():
+                await self.interaction.response.send_message(**kwargs)
+                self._observe(deferred=False)
+                return None
+            self._observe(deferred=False)
+            return await self.interaction.followup.send(wait=True, **kwargs)
+
+
+async def respond(interaction: discord.Interaction, content: str = None, **kwargs):
+    """
+    가드를 거쳐 상호작용에 응답합니다. (가드가 없으면 아직 응답하지 않았는지에 따라 send_message/followup)
+
+    :param kwargs: Passed to `InteractionResponse.send_message` or `Webhook.send`.
+    """
+    if content is not None:
+        kwargs["content"] = content
+    guard = interaction.extras.get(GUARD_KEY)
+    if guard is not None:
+        return await guard.send(**kwargs)
+    if interaction.response.is_done():
+        return await interaction.followup.send(wait=True, **kwargs)
+    await interaction.response.send_message(**kwargs)
+
+
+def guarded(handler: str, ephemeral: bool = True):
+    """
+    컴포넌트 콜백 `async def callback(self, interaction)`을 AckGuard로 감싸고 "component" 지연 시간도 기록하는 데코레이터.
+
+    예산은 봇의 `ack_budget`을 사용합니다.
+    """
+    def decorator(callback):
+        @functools.wraps(callback)
+        async def wrapper(self, interaction: discord.Interaction, *args):
+            guard = AckGuard(
+                interaction,
+                handler,
+                budget=getattr(interaction.client, "ack_budget", DEFAULT_ACK_BUDGET),
+                ephemeral=ephemeral,
+            )
+            with registry.track("component", handler):
+                async with guard:
+                    return await callback(self, interaction, *args)
+        return wrapper
+    return decorator
+
+
+class GuardedContext(commands.Context):
+    """
+    A context whose `send` and `defer` go through the AckGuard of its interaction, if any,
+    so an automatic deferral can never race a reply that is already being sent.
+    """
+
+    @property
+    def ack_guard(self):
+        return self.interaction.extras.get(GUARD_KEY) if self.interaction is not None else None
+
+    def release_ack_guard(self) -> None:
+        """ 명령어가 끝났으면 자동 defer를 취소 (이후 응답도 계속 가드를 거침) """
+        if self.ack_guard is not None:
+            self.ack_guard.close()
+
+    async def defer(self, *, ephemeral: bool = False) -> None:
+        guard = self.ack_guard
+        if guard is None:
+            return await super().defer(ephemeral=ephemeral)
+        await guard.defer(ephemeral=ephemeral)
+
+    async def send(self, content=None, **kwargs):
+        guard = self.ack_guard
+        if guard is None:
+            return await super().send(content, **kwargs)
+        async with guard.lock:
+            message = await super().send(content, **kwargs)
+            guard._observe(deferred=False)
+        return message
@@ -0,0 +1,32 @@
+"""
+무거운 모듈의 지연 로딩.
+
+`LazyModule("seaborn")`은 속성에 처음 접근하는 순간에 실제로 import 합니다.
+matplotlib/seaborn처럼 import 비용이 큰 모듈을 cog 로딩 시점이 아닌
+실제로 사용하는 시점(차트 렌더링 워커)까지 미룰 때 사용합니다.
+"""
+
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._module = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
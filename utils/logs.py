@@ -0,0 +1,205 @@
+"""
+로깅 파이프라인.
+
+이벤트 루프 스레드에서는 QueueHandler가 레코드를 큐에 넣기만 하고,
+포매팅과 콘솔/파일 쓰기는 QueueListener의 별도 스레드에서 처리합니다.
+
+- 콘솔: 레벨별 색상 포매터 (레벨마다 한 번만 만들어 둠)
+- 파일: 크기(rotate="size") 또는 시간(rotate="time") 기준으로 교체하며 backup_count개까지 보관
+- JSONL: json_file을 지정하면 수집용으로 한 줄에 레코드 하나씩 (같은 교체 규칙)
+- 샘플링: 같은 WARNING 메시지가 반복되면 window초마다 burst개까지만 내보내고, 버린 개수는 다음 로그에 덧붙임
+  (내용이 다른 메시지는 따로 세고, INFO 이하와 ERROR 이상은 항상 내보냄)
+"""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+from pathlib import Path
+import queue
+import threading
+import time
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+FILE_FORMAT = "[{asctime}] [{levelname:<8}] {name}: {message}"
+
+
+class ColorFormatter(logging.Formatter):
+    # Colors
+    black = "\x1b[30m"
+    red = "\x1b[31m"
+    green = "\x1b[32m"
+    yellow = "\x1b[33m"
+    blue = "\x1b[34m"
+    gray = "\x1b[38m"
+    # Styles
+    reset = "\x1b[0m"
+    bold = "\x1b[1m"
+
+    COLORS = {
+        logging.DEBUG: gray + bold,
+        logging.INFO: blue + bold,
+        logging.WARNING: yellow + bold,
+        logging.ERROR: red,
+        logging.CRITICAL: red + bold,
+    }
+
+    def __init__(self) -> None:
+        super().__init__()
+        # 레벨마다 포매터를 미리 만들어 두고 레코드마다 골라 씀
+        self.formatters = {
+            level: logging.Formatter(
+                f"{self.black}{self.bold}{{asctime}}{self.reset} {color}{{levelname:<8}}{self.reset} "
+                f"{self.green}{self.bold}{{name}}{self.reset} {{message}}",
+                DATE_FORMAT,
+                style="{",
+            )
+            for level, color in self.COLORS.items()
+        }
+        self.fallback = logging.Formatter(FILE_FORMAT, DATE_FORMAT, style="{")
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self.formatters.get(record.levelno, self.fallback).format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """ 한 줄에 레코드 하나를 JSON 객체로 (time, level, logger, message, exc_info) """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    # 기억하는 메시지 수가 이보다 많아지면 창이 끝난 항목을 정리
+    MAX_KEYS = 1024
+
+    def __init__(self, burst: int = 10, window: float = 60.0,
+                 min_level: int = logging.WARNING, max_level: int = logging.ERROR) -> None:
+        """
+        :param burst: How many identical records may be emitted per window.
+        :param window: The length of the sampling window in seconds.
+        :param min_level: Records below this level (e.g. INFO audit logs) are never dropped.
+        :param max_level: Records at or above this level are never dropped.
+        """
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self.max_level = max_level
+        self.suppressed_total = 0
+        self._seen = {}  # (logger, level, 메시지) -> [창 시작 시각, 창 안에서 내보낸 수, 버린 수]
+        self._lock = threading.Lock()  # 감시 스레드 등 루프 밖에서도 로그를 남김
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.min_level <= record.levelno < self.max_level:
+            return True
+        # 완성된 메시지가 같은 경우만 반복으로 봄 (대부분 f-string이라 템플릿으로는 구분할 수 없음)
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is None or now - seen[0] >= self.window:
+                suppressed = seen[2] if seen is not None else 0
+                if seen is None and len(self._seen) >= self.MAX_KEYS:
+                    self._prune(now)
+                self._seen[key] = [now, 1, 0]
+            elif seen[1] < self.burst:
+                seen[1] += 1
+                suppressed = 0
+            else:
+                seen[2] += 1
+                self.suppressed_total += 1
+                return False
+        if suppressed:
+            record.msg = f"{message} (suppressed {suppressed} identical messages)"
+            record.args = None
+        return True
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, seen in self._seen.items() if now - seen[0] >= self.window]:
+            del self._seen[key]
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """ 메시지만 미리 완성하고 예외는 exc_text로 따로 넘김 (JSONL에서 메시지와 스택을 나눠 기록하도록) """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def stop(self) -> None:
+        # 직접 멈춘 뒤 종료 시 atexit에서 한 번 더 호출되어도 무시
+        if self._thread is not None:
+            super().stop()
+
+
+def _file_handler(path: Path, config: dict) -> logging.Handler:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if config.get("rotate", "size") == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=config.get("when", "midnight"), backupCount=config.get("backup_count", 7), encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=config.get("max_bytes", 5 * 1024 * 1024), backupCount=config.get("backup_count", 7),
+        encoding="utf-8",
+    )
+
+
+def setup_logging(root_dir: Path, config: dict, names=("discord_bot",)) -> logging.handlers.QueueListener:
+    """
+    Route the given loggers through a queue to console, rotating file and optional JSONL handlers.
+
+    :param root_dir: Relative log file paths are resolved against this directory.
+    :param config: The "logging" section of config.json.
+    :param names: The loggers attached to the pipeline.
+    :return: The started listener; it is stopped (and the queue drained) at interpreter exit.
+    """
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(ColorFormatter())
+    file_handler = _file_handler(root_dir / config.get("file", "discord.log"), config)
+    file_handler.setFormatter(logging.Formatter(FILE_FORMAT, DATE_FORMAT, style="{"))
+    handlers = [console_handler, file_handler]
+    if config.get("json_file"):
+        json_handler = _file_handler(root_dir / config["json_file"], config)
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    sample = config.get("sample", {})
+    if sample.get("enabled", True):
+        queue_handler.addFilter(SamplingFilter(burst=sample.get("burst", 10), window=sample.get("window_s", 60)))
+
+    level = logging.getLevelName(config.get("level", "INFO"))
+    for name in names:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+    listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
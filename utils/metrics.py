@@ -0,0 +1,226 @@
+"""
+지연 시간 메트릭.
+
+명령어, 컴포넌트 콜백, DatabaseManager 메서드마다 (종류, 이름) 단위로
+지연 시간 히스토그램, 오류 수, 실행 중인 개수를 모읍니다.
+
+- registry: 프로세스 전역 레지스트리 (데코레이터가 봇 인스턴스 없이도 기록할 수 있도록)
+- timed()/instrumented(): 코루틴 함수/클래스의 공개 비동기 메서드를 감싸서 기록
+- MetricsServer: 127.0.0.1에서 Prometheus 텍스트 형식(/metrics)으로 노출
+- 임계값보다 오래 걸린 작업은 바로 경고 로그를 남깁니다. (slow log)
+"""
+
+import bisect
+from collections import Counter
+from contextlib import contextmanager
+import functools
+import inspect
+import logging
+import time
+
+from aiohttp import web
+
+logger = logging.getLogger("discord_bot")
+
+PREFIX = "disquad"
+# 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("bounds", "buckets", "count", "sum", "max")
+
+    def __init__(self, bounds=LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # 마지막 구간은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """ :return: The upper bound of the bucket holding the q-quantile, capped by the maximum observed. """
+        rank = q * self.count
+        seen = 0
+        for bound, bucket in zip(self.bounds, self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    value = float(value)
+    if value != value:
+        return "NaN"
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class MetricsRegistry:
+    def __init__(self, slow_threshold: float = 0.5) -> None:
+        """
+        :param slow_threshold: Operations slower than this many seconds are logged as a warning.
+        """
+        self.slow_threshold = slow_threshold
+        self.latency = {}  # (kind, name) -> Histogram
+        self.errors = Counter()  # (kind, name) -> 오류 수
+        self.in_flight = Counter()  # (kind, name) -> 실행 중인 개수
+        self.counters = Counter()  # (metric, kind, name) -> 값
+        self._bounds = {}  # kind -> 히스토그램 구간 (기본 LATENCY_BUCKETS)
+        self._gauges = {}  # metric -> 값을 돌려주는 함수
+
+    def set_buckets(self, kind: str, bounds) -> None:
+        self._bounds[kind] = tuple(bounds)
+
+    def add_gauge(self, metric: str, read) -> None:
+        """
+        :param read: A callable returning the current value, read on every scrape.
+        """
+        self._gauges[metric] = read
+
+    def histogram(self, kind: str, name: str) -> Histogram:
+        histogram = self.latency.get((kind, name))
+        if histogram is None:
+            histogram = self.latency[(kind, name)] = Histogram(self._bounds.get(kind, LATENCY_BUCKETS))
+        return histogram
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False) -> None:
+        self.histogram(kind, name).observe(seconds)
+        if error:
+            self.errors[(kind, name)] += 1
+        if seconds >= self.slow_threshold:
+            logger.warning(f"Slow {kind} '{name}' took {seconds * 1000:.0f}ms{' (failed)' if error else ''}")
+
+    def increment(self, metric: str, kind: str, name: str, amount: int = 1) -> None:
+        self.counters[(metric, kind, name)] += amount
+
+    def begin(self, kind: str, name: str):
+        """ 측정을 시작하고 end()에 넘길 토큰을 반환 (시작과 끝이 다른 이벤트에 있을 때 사용) """
+        self.in_flight[(kind, name)] += 1
+        return kind, name, time.perf_counter()
+
+    def end(self, token, error: bool = False) -> None:
+        kind, name, started = token
+        self.in_flight[(kind, name)] -= 1
+        self.observe(kind, name, time.perf_counter() - started, error)
+
+    @contextmanager
+    def track(self, kind: str, name: str):
+        token = self.begin(kind, name)
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.end(token, error)
+
+    def render(self) -> str:
+        """ Prometheus 텍스트 형식 (exposition format 0.0.4) """
+        lines = [f"# TYPE {PREFIX}_latency_seconds histogram"]
+        for (kind, name), histogram in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, bucket in zip((*histogram.bounds, float("inf")), histogram.buckets):
+                cumulative += bucket
+                lines.append(f"{PREFIX}_latency_seconds_bucket{_labels(kind=kind, name=name, le=_number(bound))} {cumulative}")
+            lines.append(f"{PREFIX}_latency_seconds_sum{_labels(kind=kind, name=name)} {_number(histogram.sum)}")
+            lines.append(f"{PREFIX}_latency_seconds_count{_labels(kind=kind, name=name)} {histogram.count}")
+
+        lines.append(f"# TYPE {PREFIX}_errors_total counter")
+        for (kind, name), value in sorted(self.errors.items()):
+            lines.append(f"{PREFIX}_errors_total{_labels(kind=kind, name=name)} {value}")
+
+        lines.append(f"# TYPE {PREFIX}_in_flight gauge")
+        for (kind, name), value in sorted(self.in_flight.items()):
+            lines.append(f"{PREFIX}_in_flight{_labels(kind=kind, name=name)} {value}")
+
+        for metric in sorted({metric for metric, _, _ in self.counters}):
+            lines.append(f"# TYPE {PREFIX}_{metric}_total counter")
+            for (counter_metric, kind, name), value in sorted(self.counters.items()):
+                if counter_metric == metric:
+                    lines.append(f"{PREFIX}_{metric}_total{_labels(kind=kind, name=name)} {value}")
+
+        for metric, read in sorted(self._gauges.items()):
+            try:
+                value = read()
+            except Exception as e:
+                logger.error(f"Failed to read gauge {metric}\n❌ {type(e).__name__}: {e}")
+                continue
+            lines.append(f"# TYPE {PREFIX}_{metric} gauge")
+            lines.append(f"{PREFIX}_{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, limit: int = 20) -> str:
+        """ 로그용 요약 (p99가 느린 순으로 최대 limit개) """
+        lines = [f"{'kind':<10} {'name':<32} {'count':>7} {'errors':>7} {'p50':>8} {'p99':>8} {'max':>8}"]
+        rows = sorted(self.latency.items(), key=lambda item: -item[1].quantile(0.99))[:limit]
+        for (kind, name), histogram in rows:
+            lines.append(
+                f"{kind:<10} {name:<32} {histogram.count:>7} {self.errors[(kind, name)]:>7} "
+                f"{histogram.quantile(0.5) * 1000:>6.1f}ms {histogram.quantile(0.99) * 1000:>6.1f}ms "
+                f"{histogram.max * 1000:>6.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+registry = MetricsRegistry()
+
+
+def timed(kind: str, name: str = None):
+    """ 코루틴 함수의 지연 시간, 오류, 실행 중인 개수를 기록하는 데코레이터 """
+    def decorator(func):
+        metric_name = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with registry.track(kind, metric_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrumented(kind: str):
+    """ 클래스의 공개 비동기 메서드를 모두 timed()로 감싸는 클래스 데코레이터 """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+                setattr(cls, attr, timed(kind, attr)(value))
+        return cls
+    return decorator
+
+
+class MetricsServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108) -> None:
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
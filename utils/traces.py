@@ -0,0 +1,116 @@
+"""
+상호작용 트레이스 기록.
+
+설정에서 켜면(traces.enabled) 봇이 받는 모든 상호작용을 익명화해서 JSONL 파일에 한 줄씩 남깁니다.
+benchmarks/replay.py가 이 파일을 읽어서 같은 트래픽 모양(투표 버튼 몰림, MVP 동시 클릭 등)을 재현합니다.
+
+한 줄의 형식 (경로가 .gz로 끝나면 gzip 압축):
+
+    {"t": 1741170000.123, "k": "b", "n": "vote_2025-03-05", "u": "3f9a1c0d2b7e", "g": "a81c3e5f0d94"}
+
+- t: 상호작용 생성 시각 (유닉스 초)
+- k: "c"(명령어) 또는 "b"(컴포넌트)
+- n: 명령어 이름 또는 custom_id (custom_id 안의 Discord ID도 익명화)
+- u, g: 사용자와 길드 ID의 HMAC-SHA256 앞 12자리 (같은 솔트 안에서만 같은 값)
+"""
+
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+from pathlib import Path
+import re
+
+import discord
+
+logger = logging.getLogger("discord_bot")
+
+COMMAND = "c"
+COMPONENT = "b"
+
+# custom_id 안에 들어 있는 Discord ID (snowflake)
+SNOWFLAKE = re.compile(r"\d{17,20}")
+
+
+def _open(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_trace(path) -> list:
+    """ :return: The recorded events ordered by time. """
+    with _open(Path(path), "r") as file:
+        events = [json.loads(line) for line in file if line.strip()]
+    return sorted(events, key=lambda event: event["t"])
+
+
+def write_trace(path, events) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _open(path, "a") as file:
+        file.writelines(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n" for event in events)
+
+
+class TraceRecorder:
+    def __init__(self, path, salt: str = None, flush_every: int = 100) -> None:
+        """
+        :param path: The JSONL file events are appended to.
+        :param salt: The HMAC key of the anonymization; a random one is used when omitted,
+            so ids cannot be linked across restarts.
+        :param flush_every: How many events are buffered before they are written out.
+        """
+        self.path = Path(path)
+        self.salt = salt.encode("utf-8") if salt else os.urandom(16)
+        self.flush_every = flush_every
+        self.recorded = 0
+        self._buffer = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+
+    def anonymize(self, value) -> str:
+        return hmac.new(self.salt, str(value).encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+
+    def record(self, interaction: discord.Interaction) -> None:
+        if interaction.type == discord.InteractionType.application_command:
+            kind = COMMAND
+            name = interaction.command.qualified_name if interaction.command else interaction.data.get("name")
+        elif interaction.type == discord.InteractionType.component:
+            kind = COMPONENT
+            name = SNOWFLAKE.sub(lambda match: self.anonymize(match.group()), interaction.data.get("custom_id", ""))
+        else:
+            return
+        self._buffer.append({
+            "t": round(interaction.created_at.timestamp(), 3),
+            "k": kind,
+            "n": name,
+            "u": self.anonymize(interaction.user.id),
+            "g": self.anonymize(interaction.guild_id) if interaction.guild_id else None,
+        })
+        self.recorded += 1
+        # 이전 flush가 아직 진행 중이면 그 뒤의 flush나 close()가 버퍼를 함께 기록
+        if len(self._buffer) >= self.flush_every and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+            self._flush_task.add_done_callback(self._log_flush_error)
+
+    def _log_flush_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            error = task.exception()
+            logger.error(f"Failed to write interaction trace to {self.path}\n❌ {type(error).__name__}: {error}")
+
+    async def flush(self) -> None:
+        """ 버퍼의 이벤트를 파일에 추가 (파일 쓰기는 루프를 막지 않도록 스레드에서) """
+        async with self._flush_lock:
+            events, self._buffer = self._buffer, []
+            if events:
+                await asyncio.to_thread(write_trace, self.path, events)
+
+    async def close(self) -> None:
+        """ 진행 중인 flush를 기다린 뒤 남은 버퍼를 기록 """
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
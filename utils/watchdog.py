@@ -0,0 +1,132 @@
+"""
+이벤트 루프 정지 감지기.
+
+루프 안의 하트비트 코루틴이 interval마다 깨어나면서 예정보다 늦어진 시간(루프 지연)을 기록하고,
+별도 스레드가 하트비트를 지켜보다가 stall_threshold 이상 멈춰 있으면 그 순간 루프 스레드의
+파이썬 스택과 실행 중인 태스크, 진행 중인 명령어/콜백을 캡처합니다.
+루프가 풀리면 멈춘 시간과 함께 캡처한 보고서를 한 번에 로그로 남깁니다.
+
+지연 시간은 "loop"/"lag" 히스토그램과 최근 구간의 p50/p99/max 게이지로 utils.metrics에 노출됩니다.
+"""
+
+import asyncio
+from collections import deque
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from utils.metrics import registry
+
+logger = logging.getLogger("discord_bot")
+
+# 루프 지연 히스토그램의 구간 상한 (초)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+registry.set_buckets("loop", LAG_BUCKETS)
+
+# 보고서에 남길 스택의 최대 프레임 수 (가장 안쪽 프레임부터)
+STACK_LIMIT = 30
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25,
+                 hang_threshold: float = 10.0, window: int = 600) -> None:
+        """
+        :param interval: Seconds between heartbeats of the event loop.
+        :param stall_threshold: A heartbeat later than this many seconds is reported as a stall.
+        :param hang_threshold: A stall still going on after this many seconds is logged right away,
+            without waiting for the loop to recover.
+        :param window: How many recent lag samples the percentile gauges are computed over.
+        """
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.hang_threshold = hang_threshold
+        self.lags = deque(maxlen=window)
+        self.stalls = 0
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = 0.0
+        self._report = None  # 현재 정지에 대해 스레드가 캡처한 보고서
+        self._heartbeat_task = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """ 실행 중인 이벤트 루프에서 호출 """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="loop-watchdog-heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        registry.add_gauge("loop_lag_p50_seconds", lambda: self.percentile(0.5))
+        registry.add_gauge("loop_lag_p99_seconds", lambda: self.percentile(0.99))
+        registry.add_gauge("loop_lag_max_seconds", lambda: max(self.lags, default=0.0))
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    def percentile(self, q: float) -> float:
+        """ :return: The q-quantile of the recent lag samples, in seconds. """
+        if not self.lags:
+            return 0.0
+        lags = sorted(self.lags)
+        return lags[min(len(lags) - 1, int(q * len(lags)))]
+
+    async def _heartbeat(self) -> None:
+        histogram = registry.histogram("loop", "lag")
+        while True:
+            scheduled = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - scheduled)
+            self.lags.append(lag)
+            histogram.observe(lag)
+
+            report, self._report = self._report, None
+            if lag >= self.stall_threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop stalled for {lag * 1000:.0f}ms" + (f"\n{report}" if report else ""))
+
+    def _watch(self) -> None:
+        """ 감시 스레드: 하트비트가 늦어지면 그 순간의 루프 스레드 상태를 캡처 """
+        captured_beat = None
+        hang_logged = False
+        while not self._stopped.wait(self.interval / 2):
+            last_beat = self._last_beat
+            blocked = time.monotonic() - last_beat - self.interval
+            if blocked < self.stall_threshold:
+                continue
+            if captured_beat != last_beat:
+                # 정지 하나당 한 번만 캡처
+                captured_beat = last_beat
+                hang_logged = False
+                self._report = self._capture()
+            elif not hang_logged and blocked >= self.hang_threshold:
+                hang_logged = True
+                logger.error(f"Event loop has been blocked for {blocked:.1f}s\n{self._report}")
+
+    def _capture(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame is not None else "(no frame)\n"
+
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            coro = task.get_coro()
+            task_text = f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        else:
+            task_text = "(loop callback, no task)"
+        operations = ", ".join(
+            f"{kind} '{name}'" for (kind, name), count in list(registry.in_flight.items())
+            if count > 0 and kind != "db"
+        ) or "none"
+        return f"Running task: {task_text}\nIn-flight commands/callbacks: {operations}\nLoop thread stack:\n{stack}"